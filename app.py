@@ -1,19 +1,47 @@
+import sys, time
+_run_started = time.perf_counter()
+_cold = "services.rate_limiter" not in sys.modules  # first script run in this process
 
+import importlib
+import uuid
 import streamlit as st
-from tabs import llm_tab, stt_tab, tts_tab, interview_tab
+from services import metrics, rate_limiter
 
 st.set_page_config(page_title="AI Interviewer", layout="wide")
 
-tab_objs = st.tabs(["LLM", "STT", "TTS", "Give Interview"])
+# Tag each page's API calls so the shared rate limiter can queue sessions
+# fairly and serve interview turns ahead of the playground pages
+if "rate_session" not in st.session_state:
+    st.session_state.rate_session = uuid.uuid4().hex
+session_id = st.session_state.rate_session
 
-with tab_objs[0]:
-    llm_tab.render()
 
-with tab_objs[1]:
-    stt_tab.render()
+def _page(module: str, priority: int):
+    """
+    Page body that imports tabs.<module> (and with it the services, requests,
+    the mic recorder...) on first visit, so only the selected page costs anything.
+    """
+    def run():
+        name = f"tabs.{module}"
+        if name in sys.modules:
+            tab = sys.modules[name]
+        else:
+            with metrics.span("app", "import"):
+                tab = importlib.import_module(name)
+        with rate_limiter.context(session_id, priority):
+            tab.render()
+    return run
 
-with tab_objs[2]:
-    tts_tab.render()
 
-with tab_objs[3]:
-    interview_tab.render()
\ No newline at end of file
+# Only the selected page runs on each rerun (st.tabs ran all four)
+page = st.navigation([
+    st.Page(_page("llm_tab", rate_limiter.PLAYGROUND), title="LLM", url_path="llm", default=True),
+    st.Page(_page("stt_tab", rate_limiter.PLAYGROUND), title="STT", url_path="stt"),
+    st.Page(_page("tts_tab", rate_limiter.PLAYGROUND), title="TTS", url_path="tts"),
+    st.Page(_page("interview_tab", rate_limiter.INTERVIEW), title="Give Interview", url_path="interview"),
+], position="top")
+try:
+    page.run()
+finally:
+    # Whole script run, imports included; st.rerun() exits through here too
+    metrics.observe("app", "cold_start" if _cold else "rerun", time.perf_counter() - _run_started)
@@ -0,0 +1,46 @@
+import argparse, json, sys
+from typing import Dict, List, Optional
+
+# Usage: python -m benchmarks.compare before.json after.json [--metric p95]
+
+
+def _load(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(before: Dict, after: Dict, metrics: List[str]) -> List[str]:
+    """One line per scenario/timing/metric present in both runs."""
+    lines = []
+    a_res, b_res = before.get("results", {}), after.get("results", {})
+    for scenario in sorted(set(a_res) & set(b_res)):
+        for timing in sorted(set(a_res[scenario]) & set(b_res[scenario])):
+            a, b = a_res[scenario][timing], b_res[scenario][timing]
+            if not isinstance(a, dict) or not isinstance(b, dict):
+                continue
+            for m in metrics:
+                if m not in a or m not in b:
+                    continue
+                old, new = a[m] * 1000, b[m] * 1000
+                change = (new - old) / old * 100 if old else float("nan")
+                lines.append(f"{scenario:<11} {timing:<12} {m:<4} {old:9.1f}ms -> {new:9.1f}ms  {change:+6.1f}%")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    ap.add_argument("before")
+    ap.add_argument("after")
+    ap.add_argument("--metric", action="append", help="p50/p95/p99/mean (repeatable; default p50, p95, p99)")
+    args = ap.parse_args(argv)
+    before, after = _load(args.before), _load(args.after)
+    if before["meta"].get("profile") != after["meta"].get("profile"):
+        print(f"warning: profiles differ ({before['meta'].get('profile')} vs {after['meta'].get('profile')})",
+              file=sys.stderr)
+    for line in compare(before, after, args.metric or ["p50", "p95", "p99"]):
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
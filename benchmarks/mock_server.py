@@ -0,0 +1,229 @@
+import json, random, sys, threading, time
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# A local stand-in for the three OpenAI endpoints the services call, so
+# benchmarks run offline and don't spend API credit:
+#   POST /v1/chat/completions      (JSON or SSE when "stream": true)
+#   POST /v1/audio/transcriptions  (multipart upload -> {"text": ...})
+#   POST /v1/audio/speech          (JSON -> fake MP3 bytes)
+
+
+@dataclass
+class Profile:
+    latency: float = 0.05          # seconds before the first byte of a response
+    jitter: float = 0.02           # +/- uniform noise added to latency
+    token_delay: float = 0.01      # seconds between streamed chat chunks
+    per_kb: float = 0.0005         # extra seconds per KB uploaded (STT) or per 100 chars spoken (TTS)
+    error_rate: float = 0.0        # share of requests answered with 500
+    rate_limit_rate: float = 0.0   # share of requests answered with 429
+    retry_after: int = 0           # Retry-After seconds sent with 429s (whole seconds, as in the API)
+    slow_rate: float = 0.0         # share of requests that stall before answering (tail latency)
+    slow_delay: float = 0.0        # seconds such a request stalls
+
+
+PROFILES: Dict[str, Profile] = {
+    "instant": Profile(latency=0.0, jitter=0.0, token_delay=0.0, per_kb=0.0),
+    "fast": Profile(),
+    "realistic": Profile(latency=0.35, jitter=0.15, token_delay=0.03, per_kb=0.002),
+    "flaky": Profile(latency=0.1, jitter=0.05, error_rate=0.05, rate_limit_rate=0.05),
+    "throttled": Profile(latency=0.1, jitter=0.05, rate_limit_rate=0.3, retry_after=1),
+    "tail": Profile(latency=0.1, jitter=0.03, slow_rate=0.05, slow_delay=2.0),
+}
+
+REPLY = (
+    "Thanks for sharing that. Could you walk me through a project where you had to "
+    "make a difficult technical trade-off? What options did you consider, and how "
+    "did you decide which one to take?"
+)
+TRANSCRIPT = "I led the migration of our billing service to a queue based design last year."
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients dropping pooled keep-alive connections is normal, not an error
+        if isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class MockOpenAI:
+    """
+    Threaded HTTP server on 127.0.0.1 with a latency/error `Profile`.
+
+        with MockOpenAI(PROFILES["realistic"]) as server:
+            os.environ["OPENAI_BASE_URL"] = server.base_url
+            ...
+
+    `counts` tracks requests per path and status code.
+    """
+
+    def __init__(self, profile: Optional[Profile] = None, port: int = 0, seed: Optional[int] = None):
+        self.profile = profile or Profile()
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        self.counts_lock = threading.Lock()
+        self.httpd = _Server(("127.0.0.1", port), _handler(self))
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockOpenAI":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockOpenAI":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ---- helpers used by the handler ----
+    def roll(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+    def delay(self, extra: float = 0.0) -> None:
+        p = self.profile
+        with self.rng_lock:
+            noise = self.rng.uniform(-p.jitter, p.jitter) if p.jitter else 0.0
+            if p.slow_rate and self.rng.random() < p.slow_rate:
+                extra += p.slow_delay
+        time.sleep(max(0.0, p.latency + noise + extra))
+
+    def count(self, key: str) -> None:
+        with self.counts_lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+def _handler(server: MockOpenAI):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def log_message(self, format, *args):  # keep benchmark output clean
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            path = self.path.split("?", 1)[0]
+            routes = {
+                "/v1/chat/completions": self._chat,
+                "/v1/audio/transcriptions": self._transcribe,
+                "/v1/audio/speech": self._speech,
+            }
+            route = routes.get(path)
+            if route is None:
+                return self._json(404, {"error": {"message": f"Unknown path {path}"}})
+            if self._injected_failure():
+                return
+            route(body)
+
+        # ---- failures ----
+        def _injected_failure(self) -> bool:
+            p = server.profile
+            roll = server.roll()
+            if roll < p.rate_limit_rate:
+                server.delay()
+                self._json(429, {"error": {"message": "Rate limit reached (mock)"}},
+                           headers={"Retry-After": str(int(p.retry_after))})
+                return True
+            if roll < p.rate_limit_rate + p.error_rate:
+                server.delay()
+                self._json(500, {"error": {"message": "Internal error (mock)"}})
+                return True
+            return False
+
+        # ---- endpoints ----
+        def _chat(self, body: bytes):
+            try:
+                req = json.loads(body or b"{}")
+            except ValueError:
+                return self._json(400, {"error": {"message": "Invalid JSON"}})
+            model = req.get("model", "mock")
+            server.delay()
+            if not req.get("stream"):
+                return self._json(200, {
+                    "id": "chatcmpl-mock", "object": "chat.completion", "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": REPLY}}],
+                })
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            words = REPLY.split(" ")
+            for i, word in enumerate(words):
+                piece = word if i == 0 else " " + word
+                chunk = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "model": model,
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                self._chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                if server.profile.token_delay:
+                    time.sleep(server.profile.token_delay)
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+            server.count(f"{self.path} 200")
+
+        def _transcribe(self, body: bytes):
+            server.delay(server.profile.per_kb * len(body) / 1024)
+            self._json(200, {"text": TRANSCRIPT})
+
+        def _speech(self, body: bytes):
+            try:
+                req = json.loads(body or b"{}")
+            except ValueError:
+                return self._json(400, {"error": {"message": "Invalid JSON"}})
+            text = req.get("input") or ""
+            server.delay(server.profile.per_kb * len(text) / 100)
+            # ~1 KB of "MP3" per 15 characters, roughly what real speech costs
+            audio = b"ID3" + bytes(max(1, len(text)) * 64)
+            self._send(200, audio, "audio/mpeg")
+
+        # ---- plumbing ----
+        def _json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+            self._send(status, json.dumps(payload).encode(), "application/json", headers)
+
+        def _send(self, status: int, data: bytes, ctype: str, headers: Optional[Dict[str, str]] = None):
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+            server.count(f"{self.path} {status}")
+
+        def _chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Run the mock OpenAI server in the foreground.")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="fast")
+    args = ap.parse_args()
+    srv = MockOpenAI(PROFILES[args.profile], port=args.port)
+    print(f"Mock OpenAI on {srv.base_url} (profile {args.profile}: {asdict(srv.profile)})")
+    print(f"Point the app at it with OPENAI_BASE_URL={srv.base_url}")
+    try:
+        srv.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.httpd.server_close()
+        sys.exit(0)
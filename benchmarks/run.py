@@ -0,0 +1,255 @@
+import argparse, io, json, math, os, platform, subprocess, sys, time, wave
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _ROOT not in sys.path:  # executed directly: python benchmarks/run.py
+    sys.path.insert(0, _ROOT)
+
+from benchmarks.mock_server import MockOpenAI, PROFILES
+
+# Usage:
+#   python -m benchmarks.run --profile realistic --iterations 30 --out bench.json
+#   python -m benchmarks.compare before.json after.json
+#
+# Services are imported only after OPENAI_BASE_URL points at the mock server,
+# since their endpoints are read at import time.
+
+SCENARIOS = ("llm_chat", "llm_stream", "stt", "tts", "turn", "app_cold_start", "app_rerun")
+
+# Runs in a fresh interpreter: Streamlit's import, then the app's first script run
+_COLD_START = """
+import json, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+t2 = time.perf_counter()
+if at.exception:
+    raise SystemExit(at.exception[0].value)
+print(json.dumps({{"total": t2 - t0, "first_run": t2 - t1, "streamlit_import": t1 - t0}}))
+"""
+
+MESSAGES = [
+    {"role": "system", "content": "You are a professional interviewer for the role of Backend Engineer."},
+    {"role": "assistant", "content": "Welcome, let's begin. Tell me about yourself."},
+    {"role": "user", "content": "I have five years of experience building APIs in Python."},
+]
+SPEECH = "Thanks for sharing that. Could you walk me through a difficult technical trade-off you made?"
+
+
+def make_wav(seconds: float = 4.0, rate: int = 44100, channels: int = 2) -> bytes:
+    """A recorder-like clip: a tone with silence on both ends, 16-bit PCM."""
+    frames = int(seconds * rate)
+    lead = frames // 8
+    samples = bytearray()
+    for i in range(frames):
+        v = 0
+        if lead <= i < frames - lead:
+            v = int(8000 * math.sin(2 * math.pi * 220 * i / rate))
+        samples += v.to_bytes(2, "little", signed=True) * channels
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(samples))
+    return buf.getvalue()
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile of `values` (q in 0..100)."""
+    if not values:
+        return float("nan")
+    s = sorted(values)
+    k = (len(s) - 1) * q / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def summarize(samples: List[float], errors: int) -> Dict:
+    out = {"n": len(samples), "errors": errors}
+    if samples:
+        out.update({
+            "mean": sum(samples) / len(samples),
+            "min": min(samples),
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+            "max": max(samples),
+        })
+    return out
+
+
+class Scenarios:
+    """
+    Each scenario runs one call and returns named timings in seconds; the
+    first key is the headline metric (e.g. total), extras such as time to
+    first token are reported alongside.
+    """
+
+    def __init__(self):
+        from services import llm_service, stt_service, tts_service, speech_pipeline
+        self.llm_service, self.stt_service = llm_service, stt_service
+        self.tts_service, self.speech_pipeline = tts_service, speech_pipeline
+        self.wav = make_wav()
+        self._app = None
+
+    def llm_chat(self) -> Dict[str, float]:
+        t0 = time.perf_counter()
+        self.llm_service.chat(MESSAGES)
+        return {"total": time.perf_counter() - t0}
+
+    def llm_stream(self) -> Dict[str, float]:
+        t0 = time.perf_counter()
+        first = None
+        for _ in self.llm_service.chat_stream(MESSAGES):
+            if first is None:
+                first = time.perf_counter() - t0
+        return {"total": time.perf_counter() - t0, "first_token": first or 0.0}
+
+    def stt(self) -> Dict[str, float]:
+        t0 = time.perf_counter()
+        self.stt_service.transcribe_audio(memoryview(self.wav), filename="reply.wav")
+        return {"total": time.perf_counter() - t0}
+
+    def tts(self) -> Dict[str, float]:
+        t0 = time.perf_counter()
+        self.tts_service.synthesize_speech(SPEECH, cache=False)
+        return {"total": time.perf_counter() - t0}
+
+    def turn(self) -> Dict[str, float]:
+        """One interview turn as the tab runs it: STT -> streamed LLM -> pipelined TTS."""
+        t0 = time.perf_counter()
+        text = self.stt_service.transcribe_audio(memoryview(self.wav), filename="reply.wav")
+        stt_done = time.perf_counter() - t0
+        messages = MESSAGES + [{"role": "user", "content": text}]
+        pipe = self.speech_pipeline.SpeechPipeline(
+            synthesize=lambda s: self.tts_service.synthesize_speech(s, cache=False))
+        first_audio = None
+        try:
+            for _ in pipe.feed(self.llm_service.chat_stream(messages)):
+                for _segment in pipe.ready():
+                    if first_audio is None:
+                        first_audio = time.perf_counter() - t0
+            for _segment in pipe.drain():
+                if first_audio is None:
+                    first_audio = time.perf_counter() - t0
+            pipe.audio()
+        finally:
+            pipe.close()
+        return {"total": time.perf_counter() - t0, "stt": stt_done,
+                "first_audio": first_audio or 0.0}
+
+
+    def app_cold_start(self) -> Dict[str, float]:
+        """Process start to the end of the first run of app.py (default page)."""
+        out = subprocess.run([sys.executable, "-c", _COLD_START.format(app=os.path.join(_ROOT, "app.py"))],
+                             cwd=_ROOT, capture_output=True, text=True, timeout=120)
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "cold start failed")
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+    def app_rerun(self) -> Dict[str, float]:
+        """One rerun of app.py once everything is imported (what each widget interaction costs)."""
+        if self._app is None:
+            from streamlit.testing.v1 import AppTest
+            self._app = AppTest.from_file(os.path.join(_ROOT, "app.py"), default_timeout=60)
+            self._app.run()
+        t0 = time.perf_counter()
+        self._app.run()
+        elapsed = time.perf_counter() - t0
+        if self._app.exception:
+            raise RuntimeError(self._app.exception[0].value)
+        return {"total": elapsed}
+
+
+def run_scenario(fn: Callable[[], Dict[str, float]], iterations: int, warmup: int) -> Dict:
+    for _ in range(warmup):
+        try:
+            fn()
+        except Exception:
+            pass
+    timings: Dict[str, List[float]] = {}
+    errors = 0
+    last_error: Optional[str] = None
+    for _ in range(iterations):
+        try:
+            result = fn()
+        except Exception as e:
+            errors += 1
+            last_error = str(e)[:200]
+            continue
+        for k, v in result.items():
+            timings.setdefault(k, []).append(v)
+    out = {k: summarize(v, errors) for k, v in timings.items()} or {"total": summarize([], errors)}
+    if last_error:
+        out["last_error"] = last_error
+    return out
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Offline latency benchmarks against a mock OpenAI server.")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="fast")
+    ap.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    ap.add_argument("--iterations", type=int, default=20)
+    ap.add_argument("--warmup", type=int, default=2)
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--out", help="write results JSON here (default: stdout only)")
+    args = ap.parse_args(argv)
+
+    profile = PROFILES[args.profile]
+    with MockOpenAI(profile, seed=args.seed) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+        os.environ["TTS_CACHE"] = "0"
+        scenarios = Scenarios()
+        names = SCENARIOS if args.scenario == "all" else (args.scenario,)
+        results = {}
+        for name in names:
+            started = time.perf_counter()
+            results[name] = run_scenario(getattr(scenarios, name), args.iterations, args.warmup)
+            total = results[name].get("total", {})
+            print(f"{name:<11} p50={total.get('p50', float('nan')) * 1000:8.1f}ms "
+                  f"p95={total.get('p95', float('nan')) * 1000:8.1f}ms "
+                  f"p99={total.get('p99', float('nan')) * 1000:8.1f}ms "
+                  f"errors={total.get('errors', 0)} ({time.perf_counter() - started:.1f}s)",
+                  file=sys.stderr)
+        requests_seen = dict(server.counts)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "profile": args.profile,
+            "profile_settings": asdict(profile),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "results": results,
+        "server_requests": requests_seen,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
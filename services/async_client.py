@@ -0,0 +1,89 @@
+import asyncio, email.utils, time, weakref
+from typing import Optional
+
+try:
+    import httpx  # type: ignore
+except ImportError:  # optional: only needed for the a* coroutine APIs
+    httpx = None
+
+try:
+    from services import http_client
+except ImportError:  # executed directly
+    import http_client  # type: ignore
+
+# Pool size, retry budget and backoff are shared with the sync client
+MAX_RETRY_AFTER = 30.0
+
+# One AsyncClient per event loop: httpx clients must not cross loops
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+
+
+def _require_httpx():
+    if httpx is None:
+        raise RuntimeError("Async services need httpx: pip install httpx")
+
+
+def get_client() -> "httpx.AsyncClient":
+    """Return the pooled AsyncClient of the running event loop (created on first use)."""
+    _require_httpx()
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=http_client.HTTP_POOL_SIZE,
+                max_keepalive_connections=http_client.HTTP_POOL_SIZE,
+            ),
+        )
+        _clients[loop] = client
+    return client
+
+
+def _retry_after(r: "httpx.Response") -> Optional[float]:
+    value = r.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+async def post(url: str, timeout: float, **kwargs) -> "httpx.Response":
+    """
+    POST through the loop's shared client, retrying 429/5xx and connection
+    failures with the same budget and backoff as `http_client`. `timeout`
+    bounds every attempt; cancelling the awaiting task aborts the request.
+    """
+    client = get_client()
+    attempt = 0
+    while True:
+        try:
+            r = await client.post(url, timeout=timeout, **kwargs)
+        except httpx.ConnectError:
+            if attempt >= http_client.HTTP_MAX_RETRIES:
+                raise
+        else:
+            if r.status_code not in http_client.RETRY_STATUSES or attempt >= http_client.HTTP_MAX_RETRIES:
+                return r
+            delay = _retry_after(r)
+            await r.aclose()
+            if delay is not None:
+                await asyncio.sleep(min(delay, MAX_RETRY_AFTER))
+                attempt += 1
+                continue
+        await asyncio.sleep(http_client.HTTP_BACKOFF * (2 ** attempt))
+        attempt += 1
+
+
+async def aclose() -> None:
+    """Close the running loop's client and its pooled connections."""
+    loop = asyncio.get_running_loop()
+    client = _clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
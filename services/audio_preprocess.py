@@ -0,0 +1,244 @@
+import struct, threading, time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # optional: without NumPy audio is uploaded unchanged
+    np = None
+
+# -------- Configuration --------
+TARGET_RATE = 16000          # Whisper resamples to 16 kHz internally anyway
+SILENCE_DB = -40.0           # frames this far below the loudest frame count as silence
+FRAME_MS = 20
+PAD_MS = 150                 # keep a little context around the speech
+PAUSE_MS = 200               # stretch averaged when looking for a pause to cut at
+# --------------------------------
+
+_PCM, _FLOAT, _EXTENSIBLE = 1, 3, 0xFFFE
+
+_totals = {"calls": 0, "processed": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0}
+_totals_lock = threading.Lock()
+
+
+def is_wav(data) -> bool:
+    return len(data) >= 12 and bytes(data[:4]) == b"RIFF" and bytes(data[8:12]) == b"WAVE"
+
+
+def _wav_chunks(data) -> Tuple[memoryview, memoryview]:
+    """The raw `fmt ` and `data` chunk bodies of a RIFF/WAVE buffer."""
+    mv = memoryview(data)
+    if not is_wav(mv):
+        raise ValueError("Not a RIFF/WAVE buffer")
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(mv):
+        cid = bytes(mv[pos:pos + 4])
+        size = struct.unpack_from("<I", mv, pos + 4)[0]
+        body = mv[pos + 8:pos + 8 + size]
+        if cid == b"fmt ":
+            if len(body) < 16:
+                raise ValueError("Malformed WAV header")
+            fmt = body
+        elif cid == b"data":
+            if fmt is None:
+                break
+            return fmt, body
+        pos += 8 + size + (size & 1)  # chunks are word aligned
+    raise ValueError("WAV is missing its fmt or data chunk")
+
+
+def read_wav(data) -> Tuple["np.ndarray", int]:
+    """
+    Decode a RIFF/WAVE buffer to float32 samples in [-1, 1] shaped (frames, channels).
+    Handles 8/16/24/32-bit PCM and 32/64-bit float, including WAVE_FORMAT_EXTENSIBLE.
+    """
+    fmt_body, pcm = _wav_chunks(data)
+    tag, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", fmt_body)
+    if tag == _EXTENSIBLE and len(fmt_body) >= 26:
+        tag = struct.unpack_from("<H", fmt_body, 24)[0]
+    width = bits // 8
+    if not channels or not width or not rate:
+        raise ValueError("Malformed WAV header")
+    usable = len(pcm) - len(pcm) % (width * channels)
+    raw = np.frombuffer(pcm[:usable], dtype=np.uint8)
+    if tag == _FLOAT and bits in (32, 64):
+        x = raw.view("<f4" if bits == 32 else "<f8").astype(np.float32)
+    elif tag == _PCM and bits == 8:
+        x = (raw.astype(np.float32) - 128.0) / 128.0
+    elif tag == _PCM and bits == 16:
+        x = raw.view("<i2").astype(np.float32) / 32768.0
+    elif tag == _PCM and bits == 24:
+        b = raw.reshape(-1, 3).astype(np.int32)
+        v = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        v = np.where(v >= 1 << 23, v - (1 << 24), v)
+        x = v.astype(np.float32) / float(1 << 23)
+    elif tag == _PCM and bits == 32:
+        x = raw.view("<i4").astype(np.float32) / float(1 << 31)
+    else:
+        raise ValueError(f"Unsupported WAV encoding (format {tag}, {bits} bit)")
+    return x.reshape(-1, channels), rate
+
+
+def to_mono(x: "np.ndarray") -> "np.ndarray":
+    return x[:, 0] if x.shape[1] == 1 else x.mean(axis=1, dtype=np.float32)
+
+
+def resample(x: "np.ndarray", src_rate: int, dst_rate: int) -> "np.ndarray":
+    """Linear-interpolation resampler with a box pre-filter when downsampling."""
+    if src_rate == dst_rate or len(x) == 0:
+        return x
+    if dst_rate < src_rate:
+        k = int(round(src_rate / dst_rate))
+        if k > 1:  # moving average as a cheap anti-alias filter
+            c = np.cumsum(np.concatenate(([0.0], x)), dtype=np.float64)
+            x = ((c[k:] - c[:-k]) / k).astype(np.float32)
+    n_out = int(len(x) * dst_rate / src_rate)
+    t = np.arange(n_out, dtype=np.float64) * (src_rate / dst_rate)
+    return np.interp(t, np.arange(len(x)), x).astype(np.float32)
+
+
+def frame_rms(x: "np.ndarray", rate: int, frame_ms: int = FRAME_MS) -> Tuple["np.ndarray", int]:
+    """RMS per non-overlapping frame, plus the frame length in samples."""
+    hop = max(1, rate * frame_ms // 1000)
+    n = len(x) // hop
+    if n == 0:
+        return np.zeros(0, dtype=np.float32), hop
+    frames = x[:n * hop].reshape(n, hop)
+    return np.sqrt(np.mean(frames * frames, axis=1)), hop
+
+
+def trim_silence(x: "np.ndarray", rate: int, silence_db: float = SILENCE_DB,
+                 pad_ms: int = PAD_MS) -> "np.ndarray":
+    """Cut leading and trailing frames quieter than `silence_db` below the loudest frame."""
+    rms, hop = frame_rms(x, rate)
+    if len(rms) == 0 or rms.max() <= 0:
+        return x
+    voiced = np.flatnonzero(rms >= rms.max() * 10 ** (silence_db / 20))
+    pad = rate * pad_ms // 1000
+    start = max(0, voiced[0] * hop - pad)
+    end = min(len(x), (voiced[-1] + 1) * hop + pad)
+    return x[start:end]
+
+
+def encode_wav(x: "np.ndarray", rate: int) -> bytes:
+    """Encode mono float samples as 16-bit PCM WAV."""
+    pcm = (np.clip(x, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + len(pcm), b"WAVE",
+        b"fmt ", 16, _PCM, 1, rate, rate * 2, 2, 16,
+        b"data", len(pcm),
+    )
+    return header + pcm
+
+
+def preprocess_wav(data, target_rate: int = TARGET_RATE,
+                   trim: bool = True) -> Tuple[object, Dict[str, float]]:
+    """
+    Downmix to mono, resample to `target_rate` and trim edge silence.
+    Returns (audio, stats). Non-WAV input, undecodable WAVs, or results that
+    would not be smaller come back unchanged with stats["processed"] == 0.
+    """
+    t0 = time.perf_counter()
+    stats: Dict[str, float] = {"processed": 0, "bytes_in": len(data), "bytes_out": len(data)}
+    out = data
+    if np is not None and is_wav(data):
+        try:
+            x, rate = read_wav(data)
+            stats["duration_in"] = len(x) / rate if rate else 0.0
+            y = resample(to_mono(x), rate, target_rate)
+            if trim:
+                y = trim_silence(y, target_rate)
+            if len(y):
+                encoded = encode_wav(y, target_rate)
+                if len(encoded) < len(data):
+                    out = encoded
+                    stats["processed"] = 1
+                    stats["bytes_out"] = len(encoded)
+                    stats["duration_out"] = len(y) / target_rate
+        except (ValueError, struct.error):
+            pass
+    stats["bytes_saved"] = stats["bytes_in"] - stats["bytes_out"]
+    stats["seconds"] = time.perf_counter() - t0
+    with _totals_lock:
+        _totals["calls"] += 1
+        _totals["processed"] += int(stats["processed"])
+        _totals["bytes_in"] += int(stats["bytes_in"])
+        _totals["bytes_out"] += int(stats["bytes_out"])
+        _totals["seconds"] += stats["seconds"]
+    return out, stats
+
+
+def silence_cuts(x: "np.ndarray", rate: int, max_seconds: float) -> List[int]:
+    """
+    Sample offsets at which to cut `x` so no piece is longer than
+    `max_seconds`. Each cut lands in the quietest PAUSE_MS stretch of the
+    second half of its window (a pause between words where there is one),
+    and never leaves a last piece shorter than a quarter window.
+    """
+    rms, hop = frame_rms(x, rate)
+    window = max(4, int(max_seconds * 1000 / FRAME_MS))
+    if len(rms) <= window:
+        return []
+    k = max(1, PAUSE_MS // FRAME_MS)
+    smooth = np.convolve(rms, np.ones(k, dtype=np.float32) / k, mode="same")
+    cuts: List[int] = []
+    start = 0
+    while len(rms) - start > window:
+        lo = start + window // 2
+        hi = min(start + window, len(rms) - window // 4)
+        start = hi - 1 - int(np.argmin(smooth[lo:hi][::-1]))  # ties go to the latest pause
+        cuts.append(start * hop)
+    return cuts
+
+
+def split_wav(data, max_seconds: float, target_rate: int = TARGET_RATE,
+              preprocess: bool = True) -> Optional[List[bytes]]:
+    """
+    Prepares a WAV like preprocess_wav (mono, `target_rate`, edge silence
+    trimmed) and cuts it at pauses into pieces of at most `max_seconds`,
+    each encoded as its own WAV. With `preprocess=False` the pieces keep
+    the original samples and format. Returns None when the audio can't be
+    decoded here (no NumPy, not a WAV) or already fits in one piece.
+    """
+    if np is None or not is_wav(data):
+        return None
+    try:
+        x, rate = read_wav(data)
+    except (ValueError, struct.error):
+        return None
+    if len(x) <= max_seconds * rate:
+        return None
+    if not preprocess:
+        cuts = silence_cuts(to_mono(x), rate, max_seconds)
+        return _slice_wav(data, [0, *cuts, len(x)]) if cuts else None
+    y = trim_silence(resample(to_mono(x), rate, target_rate), target_rate)
+    cuts = silence_cuts(y, target_rate, max_seconds)
+    if not cuts:
+        return None
+    bounds = [0, *cuts, len(y)]
+    return [encode_wav(y[a:b], target_rate) for a, b in zip(bounds, bounds[1:])]
+
+
+def _slice_wav(data, bounds: List[int]) -> List[bytes]:
+    """Cuts the PCM of a WAV at the frame offsets `bounds`, copying its fmt chunk into each piece."""
+    fmt, pcm = _wav_chunks(data)
+    channels, bits = struct.unpack_from("<H", fmt, 2)[0], struct.unpack_from("<H", fmt, 14)[0]
+    align = channels * (bits // 8)
+    out = []
+    for a, b in zip(bounds, bounds[1:]):
+        body = pcm[a * align:b * align]
+        out.append(b"".join((
+            struct.pack("<4sI4s", b"RIFF", 4 + 8 + len(fmt) + (len(fmt) & 1) + 8 + len(body) + (len(body) & 1), b"WAVE"),
+            struct.pack("<4sI", b"fmt ", len(fmt)), fmt, b"\0" * (len(fmt) & 1),
+            struct.pack("<4sI", b"data", len(body)), body, b"\0" * (len(body) & 1),
+        )))
+    return out
+
+
+def totals() -> Dict[str, float]:
+    """Cumulative preprocessing counters for this process."""
+    with _totals_lock:
+        out = dict(_totals)
+    out["bytes_saved"] = out["bytes_in"] - out["bytes_out"]
+    return out
@@ -0,0 +1,247 @@
+import os, sys, json, time, hashlib, argparse, threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+try:
+    from services import stt_service, tts_service
+except ImportError:  # executed directly: python services/batch.py
+    import stt_service, tts_service  # type: ignore
+
+# Bulk transcription / synthesis through one process and one connection pool.
+#
+#   python services/batch.py stt interviews/ --out stt.jsonl
+#   python services/batch.py stt files.txt --out stt.jsonl --workers 8
+#   python services/batch.py tts lines.txt --out tts.jsonl --audio-dir tts_out/
+#
+# Inputs: a directory (searched recursively for audio files), a text file with
+# one path / utterance per line, or a .jsonl manifest ({"path": ...} for stt,
+# {"text": ..., "voice": ...} for tts). Results stream to --out as JSON lines;
+# rerunning with the same --out skips items that already succeeded.
+
+# -------- Configuration --------
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+BATCH_ATTEMPTS = int(os.getenv("BATCH_ATTEMPTS", "4"))       # tries per item (rate limits included)
+BATCH_COOLDOWN = float(os.getenv("BATCH_COOLDOWN", "2.0"))   # first pause after a 429, doubles per hit
+AUDIO_EXTS = (".wav", ".mp3", ".m4a", ".ogg", ".webm", ".flac", ".mp4", ".mpeg", ".mpga")
+# --------------------------------
+
+
+class RateGate:
+    """
+    Shared pause for all workers: when one item is rate-limited, nobody
+    starts a new request until the cooldown has passed. The pause doubles
+    on consecutive limits and resets after a success.
+    """
+
+    def __init__(self, base: float = BATCH_COOLDOWN, ceiling: float = 60.0):
+        self.base = base
+        self.ceiling = ceiling
+        self._until = 0.0
+        self._streak = 0
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def wait(self) -> None:
+        while True:
+            with self._lock:
+                delay = self._until - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def limited_now(self) -> None:
+        with self._lock:
+            self.limited += 1
+            pause = min(self.ceiling, self.base * (2 ** self._streak))
+            self._streak += 1
+            self._until = max(self._until, time.monotonic() + pause)
+
+    def ok(self) -> None:
+        with self._lock:
+            self._streak = 0
+
+
+def _is_rate_limit(e: Exception) -> bool:
+    # The services raise RuntimeError("<SERVICE> <status>: <body>")
+    return " 429" in str(e)[:20]
+
+
+# ---- inputs ----
+def stt_items(source: str) -> Iterator[Dict]:
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(AUDIO_EXTS):
+                    path = os.path.join(root, name)
+                    yield {"id": os.path.relpath(path, source), "path": path}
+        return
+    base = os.path.dirname(os.path.abspath(source))
+    for rec in _manifest(source):
+        item = {"path": rec} if isinstance(rec, str) else dict(rec)
+        path = item.get("path", "")
+        if not path:
+            continue
+        item["id"] = path
+        item["path"] = path if os.path.isabs(path) else os.path.join(base, path)  # relative to the manifest
+        yield item
+
+
+def tts_items(source: str) -> Iterator[Dict]:
+    for rec in _manifest(source):
+        item = {"text": rec} if isinstance(rec, str) else dict(rec)
+        text = item.get("text", "")
+        if not text.strip():
+            continue
+        voice = item.get("voice", "alloy")
+        item["id"] = hashlib.sha256(f"{voice}\x1f{text}".encode("utf-8")).hexdigest()[:16]
+        yield item
+
+
+def _manifest(path: str) -> Iterator:
+    jsonl = path.endswith(".jsonl")
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            yield json.loads(line) if jsonl else line
+
+
+# ---- work ----
+def stt_task(item: Dict, audio_dir: Optional[str]) -> Dict:
+    text = stt_service.transcribe_audio(item["path"], language=item.get("language"),
+                                        prompt=item.get("prompt"))
+    return {"text": text}
+
+
+def tts_task(item: Dict, audio_dir: Optional[str]) -> Dict:
+    fmt = item.get("format", "mp3")
+    audio = tts_service.synthesize_speech(item["text"], voice=item.get("voice", "alloy"), format=fmt)
+    out = {"bytes": len(audio)}
+    if audio_dir:
+        path = os.path.join(audio_dir, f"{item['id']}.{fmt}")
+        with open(path, "wb") as f:
+            f.write(audio)
+        out["audio"] = path
+    return out
+
+
+def done_ids(out_path: str) -> Set[str]:
+    """Ids that already succeeded in a previous run (torn last line ignored)."""
+    ids: Set[str] = set()
+    try:
+        with open(out_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if rec.get("ok"):
+                    ids.add(rec["id"])
+    except FileNotFoundError:
+        pass
+    return ids
+
+
+def run_batch(items: Iterable[Dict], task: Callable[[Dict, Optional[str]], Dict], out_path: str,
+              workers: int = BATCH_WORKERS, attempts: int = BATCH_ATTEMPTS,
+              audio_dir: Optional[str] = None, progress: bool = True) -> Dict:
+    """
+    Runs `task` over `items` on a bounded pool and appends one JSON line per
+    item to `out_path` as results arrive. Returns counts and throughput.
+    """
+    gate = RateGate()
+    skip = done_ids(out_path)
+    stats = {"ok": 0, "failed": 0, "skipped": 0, "rate_limited": 0}
+
+    def attempt(item: Dict) -> Dict:
+        started = time.perf_counter()
+        last: Optional[Exception] = None
+        for _ in range(max(1, attempts)):
+            gate.wait()
+            try:
+                result = task(item, audio_dir)
+            except Exception as e:
+                last = e
+                if _is_rate_limit(e):
+                    gate.limited_now()
+                    continue
+                break
+            gate.ok()
+            return {"id": item["id"], "ok": True, **result,
+                    "ms": round((time.perf_counter() - started) * 1000, 1)}
+        return {"id": item["id"], "ok": False, "error": str(last)[:500],
+                "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    start = time.perf_counter()
+    last_report = start
+    pending: Set[Future] = set()
+    source = iter(items)
+    exhausted = False
+    if audio_dir:
+        os.makedirs(audio_dir, exist_ok=True)
+    with open(out_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch") as pool:
+        try:
+            while pending or not exhausted:
+                # Keep at most 2x workers in flight so huge inputs aren't all queued up front
+                while not exhausted and len(pending) < 2 * max(1, workers):
+                    item = next(source, None)
+                    if item is None:
+                        exhausted = True
+                    elif item["id"] in skip:
+                        stats["skipped"] += 1
+                    else:
+                        skip.add(item["id"])  # duplicates in the input run once
+                        pending.add(pool.submit(attempt, item))
+                if not pending:
+                    continue
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    rec = fut.result()
+                    out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                    stats["ok" if rec["ok"] else "failed"] += 1
+                out.flush()
+                now = time.perf_counter()
+                if progress and now - last_report >= 5:
+                    last_report = now
+                    done = stats["ok"] + stats["failed"]
+                    print(f"... {done} done, {done / (now - start):.2f} items/s", file=sys.stderr)
+        except KeyboardInterrupt:
+            for fut in pending:
+                fut.cancel()
+            print("Interrupted; rerun with the same --out to resume.", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    stats["rate_limited"] = gate.limited
+    stats["seconds"] = round(elapsed, 2)
+    stats["items_per_sec"] = round((stats["ok"] + stats["failed"]) / elapsed, 3) if elapsed > 0 else 0.0
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Bulk STT / TTS with a bounded worker pool.")
+    ap.add_argument("mode", choices=("stt", "tts"))
+    ap.add_argument("source", help="directory of audio files (stt), or a .txt / .jsonl manifest")
+    ap.add_argument("--out", required=True, help="results JSONL (appended to; used for resume)")
+    ap.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    ap.add_argument("--attempts", type=int, default=BATCH_ATTEMPTS)
+    ap.add_argument("--audio-dir", help="tts: write synthesized audio here")
+    args = ap.parse_args(argv)
+
+    if args.mode == "stt":
+        items, task = stt_items(args.source), stt_task
+    else:
+        items, task = tts_items(args.source), tts_task
+    try:
+        stats = run_batch(items, task, args.out, workers=args.workers,
+                          attempts=args.attempts, audio_dir=args.audio_dir)
+    except Exception as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(stats))
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import os, time, contextvars, threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Deque, Dict, Optional
+
+try:
+    from services import http_client, rate_limiter
+except ImportError:  # executed directly
+    import http_client, rate_limiter  # type: ignore
+
+# Hedged requests: when a call is still running after the endpoint's recent
+# p95 latency, a duplicate is sent and whichever answers first is used.
+#
+#     r = hedging.post("tts", TTS_ENDPOINT, json=..., timeout=...)
+#
+# Drop-in for http_client.post. Latency is "time until post() returns", i.e.
+# response headers for streamed calls. Hedges are capped at HEDGE_MAX_RATE
+# of all calls, only go out if the rate limiter has a slot free right now,
+# and losing responses are closed without reading their body.
+
+# -------- Configuration --------
+# Endpoints to hedge, e.g. HEDGE=llm,stt,tts (empty: off, post() is a plain http_client.post)
+HEDGE_ENDPOINTS = {e.strip() for e in os.getenv("HEDGE", "").split(",") if e.strip()}
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.95"))   # hedge after this latency quantile
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.05"))  # never hedge sooner (seconds)
+HEDGE_MAX_RATE = float(os.getenv("HEDGE_MAX_RATE", "0.05"))   # hedges per call, at most
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))          # recent latencies kept per endpoint
+HEDGE_MIN_SAMPLES = 20                                        # no hedging until this many were seen
+# --------------------------------
+
+
+class LatencyTracker:
+    """Rolling window of call latencies with quantile lookups."""
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=max(1, window))
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int = HEDGE_MIN_SAMPLES) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            s = sorted(self._samples)
+        return s[min(len(s) - 1, int(q * len(s)))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class Hedger:
+    """Hedging policy and counters for one endpoint (see module comment)."""
+
+    def __init__(self, endpoint: str, quantile: float = HEDGE_QUANTILE, min_delay: float = HEDGE_MIN_DELAY,
+                 max_rate: float = HEDGE_MAX_RATE, window: int = HEDGE_WINDOW):
+        self.endpoint = endpoint
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.max_rate = max_rate
+        self.tracker = LatencyTracker(window)
+        # Hedge budget: every call earns max_rate, a hedge spends 1
+        self._credit = 1.0
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "hedged": 0, "hedge_won": 0, "no_budget": 0, "no_slot": 0}
+
+    def threshold(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little history."""
+        q = self.tracker.quantile(self.quantile)
+        return None if q is None else max(q, self.min_delay)
+
+    def post(self, url: str, tokens: float = 0, hedge: bool = True, **kwargs):
+        """
+        Same arguments as http_client.post. `tokens` is the rate-limiter cost
+        of the duplicate; `hedge=False` disables it for bodies that can only
+        be read once (file objects).
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            self._credit = min(10.0, self._credit + self.max_rate)
+        threshold = self.threshold() if hedge else None
+        if threshold is None:
+            start = time.perf_counter()
+            r = http_client.post(url, **kwargs)
+            self.tracker.add(time.perf_counter() - start)
+            return r
+
+        stream = kwargs.pop("stream", False)
+        start = time.perf_counter()
+        primary = _submit(self._attempt, url, kwargs, start)
+        if wait([primary], timeout=threshold).done:
+            return _finish(primary, stream)
+
+        with self._lock:
+            if self._credit < 1.0:
+                self._stats["no_budget"] += 1
+                budget = False
+            else:
+                self._credit -= 1.0
+                budget = True
+        slot = rate_limiter.try_slot(self.endpoint, tokens) if budget else None
+        if slot is None:
+            if budget:
+                with self._lock:
+                    self._credit += 1.0  # unspent
+                    self._stats["no_slot"] += 1
+            return _finish(primary, stream)
+
+        with self._lock:
+            self._stats["hedged"] += 1
+        backup = _submit(self._hedge_attempt, url, kwargs, slot)
+        pending = {primary, backup}
+        winner: Optional[Future] = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                if winner is None and _ok(f):
+                    winner = f
+        winner = winner or primary  # both failed: report the original call's outcome
+        for f in (primary, backup):
+            if f is not winner:
+                f.add_done_callback(_discard)
+        if winner is backup:
+            with self._lock:
+                self._stats["hedge_won"] += 1
+        return _finish(winner, stream)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out: Dict = dict(self._stats)
+        out["hedge_rate"] = out["hedged"] / out["calls"] if out["calls"] else 0.0
+        t = self.threshold()
+        out["threshold_ms"] = round(t * 1000, 1) if t is not None else None
+        out["samples"] = len(self.tracker)
+        return out
+
+    # ---- internals ----
+    def _attempt(self, url: str, kwargs: Dict, start: float):
+        r = http_client.post(url, stream=True, **kwargs)
+        self.tracker.add(time.perf_counter() - start)  # only the original call feeds the tracker
+        return r
+
+    def _hedge_attempt(self, url: str, kwargs: Dict, slot):
+        try:
+            r = http_client.post(url, stream=True, **kwargs)
+            slot.observe(r)
+            return r
+        finally:
+            rate_limiter.release(slot)
+
+
+_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+
+
+def _submit(fn, *args) -> Future:
+    return _pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _ok(f: Future) -> bool:
+    return f.exception() is None and f.result().status_code < 500
+
+
+def _finish(f: Future, stream: bool):
+    r = f.result()
+    if not stream:
+        r.content  # load the body, as a non-streamed post() would have
+    return r
+
+
+def _discard(f: Future) -> None:
+    """Close a losing response without reading its body."""
+    if not f.cancelled() and f.exception() is None:
+        f.result().close()
+
+
+_hedgers = {name: Hedger(name) for name in ("llm", "stt", "tts")}
+
+
+def post(endpoint: str, url: str, tokens: float = 0, hedge: bool = True, **kwargs):
+    """http_client.post, hedged if `endpoint` is listed in HEDGE."""
+    if endpoint not in HEDGE_ENDPOINTS:
+        return http_client.post(url, **kwargs)
+    return _hedgers[endpoint].post(url, tokens=tokens, hedge=hedge, **kwargs)
+
+
+def hedger(endpoint: str) -> Hedger:
+    return _hedgers[endpoint]
+
+
+def stats() -> Dict[str, Dict]:
+    return {name: h.stats() for name, h in _hedgers.items() if name in HEDGE_ENDPOINTS}
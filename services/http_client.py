@@ -0,0 +1,109 @@
+import os, threading, requests
+from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from services import rate_limiter
+except ImportError:  # executed directly
+    import rate_limiter  # type: ignore
+
+try:
+    from dotenv import load_dotenv  # type: ignore
+    load_dotenv()
+except Exception:
+    pass
+
+# -------- Configuration --------
+# All endpoints share one host, hence one pool: by default it holds every call
+# the rate limiter lets run at once, plus room for hedges losing a race (they
+# finish after their slot is freed). Smaller and extra connections are opened
+# and thrown away after each request.
+HTTP_POOL_HEADROOM = 8
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "0")) or rate_limiter.total_concurrency() + HTTP_POOL_HEADROOM
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# --------------------------------
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=0,  # a request that reached the server is not replayed on read errors
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the last response back so callers report it
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retry,
+        pool_block=False,
+    )
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers["Connection"] = "keep-alive"
+    return s
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session (created on first use)."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """POST through the shared session; same arguments as `requests.post`."""
+    return get_session().post(url, **kwargs)
+
+
+def retries(r: requests.Response) -> int:
+    """How many times urllib3 retried before `r` came back (0 if unknown)."""
+    history = getattr(getattr(getattr(r, "raw", None), "retries", None), "history", None)
+    return len(history) if history else 0
+
+
+def stats() -> Dict[str, int]:
+    """
+    Connection reuse counters summed over all pooled hosts:
+    requests sent, connections opened, and requests that reused a connection.
+    """
+    out = {"requests": 0, "connections": 0, "reused": 0}
+    if _session is None:
+        return out
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            out["requests"] += pool.num_requests
+            out["connections"] += pool.num_connections
+    out["reused"] = max(0, out["requests"] - out["connections"])
+    return out
+
+
+def close() -> None:
+    """Drop the shared session and its pooled connections."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
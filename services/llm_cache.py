@@ -0,0 +1,165 @@
+import os, re, json, time, sqlite3, hashlib, threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from dotenv import load_dotenv  # type: ignore
+    load_dotenv()
+except Exception:
+    pass
+
+# -------- Configuration --------
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "0") == "1"   # opt-in for temperature-0 calls
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(_ROOT, ".cache", "llm.sqlite3"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))  # seconds
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+# --------------------------------
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different prompts share an entry."""
+    return _WS.sub(" ", text or "").strip()
+
+
+def cache_key(messages: List[Dict[str, str]], model: str, temperature: float,
+              max_tokens: Optional[int]) -> str:
+    """Deterministic key: canonical JSON of the normalized request."""
+    canonical = json.dumps({
+        "model": model,
+        "temperature": round(float(temperature), 4),
+        "max_tokens": max_tokens or None,
+        "messages": [[m.get("role", ""), normalize_text(m.get("content", ""))] for m in messages],
+    }, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Reply cache: an entry-bounded in-memory LRU in front of a SQLite table.
+    Entries expire `ttl` seconds after they were stored (wall clock, so the
+    TTL survives restarts); expired rows are purged as new ones are written.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL,
+                 memory_entries: int = LLM_CACHE_MEMORY_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self._mem: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0}
+
+    # ---- public API ----
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._mem.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[1]
+                del self._mem[key]
+                self._stats["expired"] += 1
+            row = None
+            db = self._conn()
+            if db is not None:
+                try:
+                    row = db.execute("SELECT value, expires FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error:
+                    row = None
+            if row is None or row[1] <= now:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._remember(key, row[1], row[0])
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires, value)
+            db = self._conn()
+            if db is None:
+                return
+            try:
+                db.execute("INSERT OR REPLACE INTO llm_cache (key, value, expires) VALUES (?, ?, ?)",
+                           (key, value, expires))
+                self._puts += 1
+                if self._puts % 100 == 0:
+                    db.execute("DELETE FROM llm_cache WHERE expires <= ?", (time.time(),))
+                db.commit()
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out: Dict[str, float] = dict(self._stats)
+            out["memory_entries"] = len(self._mem)
+        lookups = out["memory_hits"] + out["disk_hits"] + out["misses"]
+        out["hit_rate"] = (out["memory_hits"] + out["disk_hits"]) / lookups if lookups else 0.0
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            db = self._conn()
+            if db is not None:
+                try:
+                    db.execute("DELETE FROM llm_cache")
+                    db.commit()
+                except sqlite3.Error:
+                    pass
+
+    # ---- internals (call with the lock held) ----
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        """Open the table lazily; None (memory-only) if the file can't be used."""
+        if self._db is None and self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("CREATE TABLE IF NOT EXISTS llm_cache "
+                           "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)")
+                db.commit()
+                self._db = db
+            except (OSError, sqlite3.Error):
+                self.path = ""
+        return self._db
+
+    def _remember(self, key: str, expires: float, value: str) -> None:
+        if self.memory_entries <= 0:
+            return
+        self._mem[key] = (expires, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.memory_entries:
+            self._mem.popitem(last=False)
+
+
+_default: Optional[LLMCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> LLMCache:
+    """Process-wide cache used by `llm_service` when a call opts in."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = LLMCache()
+    return _default
+
+
+def should_cache(cache: Optional[bool], temperature: float) -> bool:
+    """
+    cache=True always caches, cache=False never does; the default (None)
+    caches deterministic calls (temperature 0) when LLM_CACHE=1.
+    """
+    if cache is not None:
+        return cache
+    return LLM_CACHE_ENABLED and temperature == 0
@@ -1,5 +1,10 @@
-import os, sys, requests
-from typing import List, Dict, Optional
+import os, sys, json
+from typing import List, Dict, Iterator, Optional
+
+try:
+    from services import http_client, async_client, metrics, rate_limiter, llm_cache, hedging
+except ImportError:  # executed directly: python services/llm_service.py
+    import http_client, async_client, metrics, rate_limiter, llm_cache, hedging  # type: ignore
 
 try:  # load .env automatically
     from dotenv import load_dotenv  # type: ignore
@@ -9,7 +14,8 @@ except Exception:
 
 # -------- Configuration --------
 DEFAULT_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
-ENDPOINT = "https://api.openai.com/v1/chat/completions"
+API_BASE = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+ENDPOINT = f"{API_BASE}/chat/completions"
 TIMEOUT = int(os.getenv("LLM_TIMEOUT", "60"))
 # --------------------------------
 
@@ -21,9 +27,8 @@ def _api_key() -> str:
     return key
 
 
-def _post(messages: List[Dict[str, str]], model: str = DEFAULT_MODEL,
-          temperature: float = 0.7, max_tokens: Optional[int] = None) -> str:
-    """Low-level POST to OpenAI API."""
+def _payload(messages: List[Dict[str, str]], model: str, temperature: float,
+             max_tokens: Optional[int], stream: bool) -> Dict:
     payload: Dict = {
         "model": model,
         "messages": messages,
@@ -31,39 +36,125 @@ def _post(messages: List[Dict[str, str]], model: str = DEFAULT_MODEL,
     }
     if max_tokens:
         payload["max_tokens"] = max_tokens
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def _headers() -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {_api_key()}",
+        "Content-Type": "application/json",
+    }
+
 
-    r = requests.post(
+def _stream(messages: List[Dict[str, str]], model: str = DEFAULT_MODEL,
+            temperature: float = 0.7, max_tokens: Optional[int] = None,
+            cache: Optional[bool] = None) -> Iterator[str]:
+    """
+    Low-level streaming POST; yields content deltas from the SSE chunks.
+    With caching on (see llm_cache.should_cache) a cached reply is yielded
+    as one chunk, and a fully consumed stream is stored for next time.
+    """
+    if not llm_cache.should_cache(cache, temperature):
+        yield from _stream_uncached(messages, model, temperature, max_tokens)
+        return
+    store = llm_cache.default_cache()
+    key = llm_cache.cache_key(messages, model, temperature, max_tokens)
+    hit = store.get(key)
+    if hit is not None:
+        with metrics.span("llm", "chat") as s:
+            s.status = "cache_hit"
+        yield hit
+        return
+    parts: List[str] = []
+    for token in _stream_uncached(messages, model, temperature, max_tokens):
+        parts.append(token)
+        yield token
+    store.put(key, "".join(parts))
+
+
+def _stream_uncached(messages: List[Dict[str, str]], model: str,
+                     temperature: float, max_tokens: Optional[int]) -> Iterator[str]:
+    # The span covers the whole stream, up to the last chunk or the consumer
+    # closing the generator early; the rate-limiter slot is held just as long
+    with metrics.span("llm", "chat") as s, \
+            rate_limiter.slot("llm", tokens=rate_limiter.estimate_tokens(messages, max_tokens)) as slot:
+        yield from _stream_response(s, slot, messages, model, temperature, max_tokens)
+
+
+def _stream_response(s, slot, messages: List[Dict[str, str]], model: str,
+                     temperature: float, max_tokens: Optional[int]) -> Iterator[str]:
+    payload = _payload(messages, model, temperature, max_tokens, stream=True)
+    r = hedging.post(
+        "llm",
         ENDPOINT,
-        headers={
-            "Authorization": f"Bearer {_api_key()}",
-            "Content-Type": "application/json",
-        },
+        tokens=rate_limiter.estimate_tokens(messages, max_tokens),
+        headers={**_headers(), "Accept": "text/event-stream"},
         json=payload,
         timeout=TIMEOUT,
+        stream=True,
     )
+    slot.observe(r)
+    with r:
+        if s.on:
+            s.status = r.status_code
+            s.retries = http_client.retries(r)
+            s.bytes_out = len(json.dumps(payload))
+        if r.status_code != 200:
+            raise RuntimeError(f"OpenAI {r.status_code}: {r.text[:300]}")
+
+        got_choice = False
+        for line in r.iter_lines(decode_unicode=False):
+            if s.on:
+                s.bytes_in += len(line) + 1
+            if not line or not line.startswith(b"data:"):
+                continue  # keep-alives, comments, blank separators
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                break
+            try:
+                chunk = json.loads(data)
+                choices = chunk["choices"]
+            except (ValueError, KeyError) as e:
+                raise RuntimeError(f"Unexpected response: {data[:300]!r}") from e
+            if not choices:
+                continue
+            got_choice = True
+            delta = choices[0].get("delta") or {}
+            content = delta.get("content")
+            if content:
+                yield content
+
+        if not got_choice:
+            raise RuntimeError("Unexpected response: stream ended without choices")
 
-    if r.status_code != 200:
-        raise RuntimeError(f"OpenAI {r.status_code}: {r.text[:300]}")
 
-    data = r.json()
-    try:
-        return data["choices"][0]["message"]["content"].strip()
-    except (KeyError, IndexError) as e:
-        raise RuntimeError(f"Unexpected response: {data}") from e
+def _post(messages: List[Dict[str, str]], model: str = DEFAULT_MODEL,
+          temperature: float = 0.7, max_tokens: Optional[int] = None,
+          cache: Optional[bool] = None) -> str:
+    """Low-level POST to OpenAI API (collects the stream into one string)."""
+    return "".join(_stream(messages, model=model, temperature=temperature,
+                           max_tokens=max_tokens, cache=cache)).strip()
 
 
 def chat_once(prompt: str, model: str = DEFAULT_MODEL,
-              temperature: float = 0.7) -> str:
-    """Simple one-shot chat without history."""
+              temperature: float = 0.7, cache: Optional[bool] = None) -> str:
+    """
+    Simple one-shot chat without history.
+    `cache=True` reuses replies to identical prompts (see llm_cache); by
+    default only temperature-0 calls are cached, and only with LLM_CACHE=1.
+    """
     prompt = prompt.strip()
     if not prompt:
         raise ValueError("Prompt is empty")
     return _post([{"role": "user", "content": prompt}],
-                 model=model, temperature=temperature)
+                 model=model, temperature=temperature, cache=cache)
 
 
 def chat(messages: List[Dict[str, str]], model: str = DEFAULT_MODEL,
-         temperature: float = 0.7, max_tokens: Optional[int] = None) -> str:
+         temperature: float = 0.7, max_tokens: Optional[int] = None,
+         cache: Optional[bool] = None) -> str:
     """
     Chat with memory — pass full message history:
     messages = [
@@ -75,7 +166,56 @@ def chat(messages: List[Dict[str, str]], model: str = DEFAULT_MODEL,
     if not messages:
         raise ValueError("Messages list is empty")
     return _post(messages, model=model,
-                 temperature=temperature, max_tokens=max_tokens)
+                 temperature=temperature, max_tokens=max_tokens, cache=cache)
+
+
+def chat_stream(messages: List[Dict[str, str]], model: str = DEFAULT_MODEL,
+                temperature: float = 0.7, max_tokens: Optional[int] = None,
+                cache: Optional[bool] = None) -> Iterator[str]:
+    """Like `chat`, but yields the reply token by token as it arrives."""
+    if not messages:
+        raise ValueError("Messages list is empty")
+    return _stream(messages, model=model,
+                   temperature=temperature, max_tokens=max_tokens, cache=cache)
+
+
+def chat_once_stream(prompt: str, model: str = DEFAULT_MODEL,
+                     temperature: float = 0.7, cache: Optional[bool] = None) -> Iterator[str]:
+    """Streaming variant of `chat_once`."""
+    prompt = prompt.strip()
+    if not prompt:
+        raise ValueError("Prompt is empty")
+    return _stream([{"role": "user", "content": prompt}],
+                   model=model, temperature=temperature, cache=cache)
+
+
+def cache_stats() -> Dict:
+    """Hit/miss counters of the LLM reply cache."""
+    return llm_cache.default_cache().stats()
+
+
+async def achat(messages: List[Dict[str, str]], model: str = DEFAULT_MODEL,
+                temperature: float = 0.7, max_tokens: Optional[int] = None) -> str:
+    """Coroutine version of `chat`; shares one async connection pool per event loop."""
+    if not messages:
+        raise ValueError("Messages list is empty")
+    async with rate_limiter.aslot("llm", tokens=rate_limiter.estimate_tokens(messages, max_tokens)) as slot:
+        r = await async_client.post(
+            ENDPOINT,
+            headers=_headers(),
+            json=_payload(messages, model, temperature, max_tokens, stream=False),
+            timeout=TIMEOUT,
+        )
+        slot.observe(r)
+
+    if r.status_code != 200:
+        raise RuntimeError(f"OpenAI {r.status_code}: {r.text[:300]}")
+
+    data = r.json()
+    try:
+        return data["choices"][0]["message"]["content"].strip()
+    except (KeyError, IndexError) as e:
+        raise RuntimeError(f"Unexpected response: {data}") from e
 
 
 def generate_response(prompt: str) -> str:  # backward compatibility
@@ -0,0 +1,292 @@
+import os, time, threading, itertools
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+try:
+    from services import rate_limiter
+except ImportError:  # executed directly
+    import rate_limiter  # type: ignore
+
+# -------- Configuration --------
+METRICS_ENABLED = os.getenv("METRICS", "0") == "1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))       # serve /metrics here when > 0
+METRICS_FILE = os.getenv("METRICS_FILE", "")              # dump() default path
+METRICS_RECENT = int(os.getenv("METRICS_RECENT", "512"))  # events kept for per-turn breakdowns, per session
+METRICS_SESSIONS = 256                                    # sessions whose recent events are kept
+# Histogram bucket upper bounds, seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# --------------------------------
+
+# Usage at a call site:
+#
+#     with metrics.span("stt", "transcribe") as s:
+#         r = http_client.post(...)
+#         if s.on:
+#             s.bytes_out = len(body)
+#             s.status = r.status_code
+#             s.retries = http_client.retries(r)
+#
+# With metrics off, span() hands back one shared no-op object, so the cost
+# is a function call and an attribute check.
+
+_Key = Tuple[str, str, str]  # (stage, op, status)
+
+
+class _NoopSpan:
+    on = False
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):  # ignore s.status = ... when disabled
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    on = True
+
+    def __init__(self, registry: "Registry", stage: str, op: str):
+        self.registry = registry
+        self.stage = stage
+        self.op = op
+        self.status: Optional[object] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = 0
+        self.start = 0.0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        duration = time.perf_counter() - self.start
+        # BaseException-only exits (generator closed early, Streamlit rerun)
+        # are control flow, not failures
+        if exc_type is not None and issubclass(exc_type, Exception) and self.status in (None, 200):
+            self.status = "error"  # e.g. a 200 whose body could not be parsed
+        elif self.status is None:
+            self.status = "ok"
+        self.registry.record(self.stage, self.op, str(self.status), duration,
+                             self.bytes_in, self.bytes_out, self.retries)
+        return False
+
+
+class _Series:
+    __slots__ = ("count", "total", "bytes_in", "bytes_out", "retries", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = 0
+        self.buckets = [0] * len(BUCKETS)
+
+
+class Registry:
+    """
+    Aggregates span records per (stage, op, status) into counters and a
+    latency histogram, and keeps the most recent events for breakdowns.
+    Events are tagged with the rate-limiter session of the calling context
+    (copied into pipeline, prefetch and writer threads) and also kept per
+    session, so one busy session can't push another's out.
+    """
+
+    def __init__(self, recent: int = METRICS_RECENT, sessions: int = METRICS_SESSIONS):
+        self._series: Dict[_Key, _Series] = {}
+        self._recent: Deque[Dict] = deque(maxlen=max(1, recent))
+        self._by_session: "OrderedDict[str, Deque[Dict]]" = OrderedDict()
+        self._max_recent = max(1, recent)
+        self._max_sessions = max(1, sessions)
+        self._seq = itertools.count(1)
+        self._last_seq = 0
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, op: str, status: str, duration: float,
+               bytes_in: int = 0, bytes_out: int = 0, retries: int = 0) -> None:
+        session = rate_limiter.current_session()
+        with self._lock:
+            s = self._series.get((stage, op, status))
+            if s is None:
+                s = self._series[(stage, op, status)] = _Series()
+            s.count += 1
+            s.total += duration
+            s.bytes_in += bytes_in
+            s.bytes_out += bytes_out
+            s.retries += retries
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    s.buckets[i] += 1
+                    break
+            self._last_seq = next(self._seq)
+            event = {
+                "seq": self._last_seq, "ts": time.time(), "stage": stage, "op": op,
+                "status": status, "ms": duration * 1000, "bytes_in": bytes_in,
+                "bytes_out": bytes_out, "retries": retries,
+                "thread": threading.current_thread().name, "session": session,
+            }
+            self._recent.append(event)
+            mine = self._by_session.pop(session, None)
+            if mine is None:
+                mine = deque(maxlen=self._max_recent)
+                if len(self._by_session) >= self._max_sessions:
+                    self._by_session.popitem(last=False)  # least recently active session
+            mine.append(event)
+            self._by_session[session] = mine
+
+    def mark(self) -> int:
+        """Sequence number to pass to events_since() later."""
+        with self._lock:
+            return self._last_seq
+
+    def events_since(self, mark: int, session: Optional[str] = None) -> List[Dict]:
+        """
+        Events recorded after `mark`, oldest first: all sessions' by default,
+        or only those made on behalf of `session`.
+        """
+        with self._lock:
+            events = self._recent if session is None else self._by_session.get(session, ())
+            return [dict(e) for e in events if e["seq"] > mark]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self._recent.clear()
+            self._by_session.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            items = sorted(self._series.items())
+            snap = [(k, s.count, s.total, s.bytes_in, s.bytes_out, s.retries, list(s.buckets))
+                    for k, s in items]
+        lines = [
+            "# HELP aii_call_duration_seconds Duration of service calls and writes.",
+            "# TYPE aii_call_duration_seconds histogram",
+        ]
+        for (stage, op, status), count, total, _, _, _, buckets in snap:
+            labels = f'stage="{stage}",op="{op}",status="{status}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS, buckets):
+                cumulative += n
+                lines.append(f'aii_call_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'aii_call_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"aii_call_duration_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"aii_call_duration_seconds_count{{{labels}}} {count}")
+        for name, idx, help_text in (
+            ("aii_call_bytes_in_total", 3, "Response payload bytes received."),
+            ("aii_call_bytes_out_total", 4, "Request payload bytes sent."),
+            ("aii_call_retries_total", 5, "Transport-level retries."),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for row in snap:
+                stage, op, status = row[0]
+                lines.append(f'{name}{{stage="{stage}",op="{op}",status="{status}"}} {row[idx]}')
+        return "\n".join(lines) + "\n"
+
+
+_registry = Registry()
+_enabled = METRICS_ENABLED
+_server = None
+_server_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    """Turn instrumentation on or off at runtime (starts the endpoint if configured)."""
+    global _enabled
+    _enabled = on
+    if on and METRICS_PORT > 0:
+        serve(METRICS_PORT)
+
+
+def span(stage: str, op: str):
+    """Context manager timing one call; a shared no-op when metrics are off."""
+    if not _enabled:
+        return _NOOP
+    return Span(_registry, stage, op)
+
+
+def observe(stage: str, op: str, duration: float, status: str = "ok") -> None:
+    """Records a duration timed without a span (e.g. from before this module was imported)."""
+    if _enabled:
+        _registry.record(stage, op, status, duration)
+
+
+def registry() -> Registry:
+    return _registry
+
+
+def mark() -> int:
+    return _registry.mark()
+
+
+def events_since(mark: int, session: Optional[str] = None) -> List[Dict]:
+    return _registry.events_since(mark, session)
+
+
+def render() -> str:
+    return _registry.render()
+
+
+def dump(path: Optional[str] = None) -> str:
+    """Writes the Prometheus text to `path` (default METRICS_FILE) atomically."""
+    path = path or METRICS_FILE
+    if not path:
+        raise ValueError("No path given and METRICS_FILE is not set")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp, path)
+    return path
+
+
+def serve(port: int = METRICS_PORT, host: str = "127.0.0.1"):
+    """
+    Serves GET /metrics on a daemon thread (once per process) and returns
+    the server.
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        _server = ThreadingHTTPServer((host, port), Handler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        return _server
+
+
+if _enabled and METRICS_PORT > 0:
+    try:
+        serve(METRICS_PORT)
+    except OSError:
+        pass  # port taken, e.g. by another Streamlit worker
@@ -0,0 +1,224 @@
+import os, re, sys, json, time, random, shutil, argparse, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from services import llm_service, tts_service
+except ImportError:  # executed directly: python services/question_bank.py
+    import llm_service, tts_service  # type: ignore
+
+# Opening questions for common roles, generated and synthesized ahead of time
+# so an interview can start with a question without any API call.
+#
+#   python services/question_bank.py build "Software Engineer" "Data Scientist"
+#   python services/question_bank.py build --roles roles.txt --count 12
+#   python services/question_bank.py list
+#   python services/question_bank.py prune       # drop entries built for another model/voice
+#
+# Layout: <QUESTION_BANK_DIR>/<role key>/bank.json + q1.mp3, q2.mp3, ...
+# bank.json records what built it (bank version, LLM model, TTS model, voice,
+# format); an entry whose fingerprint doesn't match the current settings is
+# ignored, so changing LLM_MODEL / TTS_MODEL / the voice falls back to live
+# generation until the bank is rebuilt.
+
+# -------- Configuration --------
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+QUESTION_BANK_DIR = os.getenv("QUESTION_BANK_DIR", os.path.join(_ROOT, "question_bank"))
+QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK", "1") != "0"
+BANK_VERSION = 1            # bump when the prompt or the on-disk layout changes
+DEFAULT_COUNT = 10          # questions generated per role
+VOICE = "alloy"             # the interview tab's voice
+FORMAT = "mp3"
+# --------------------------------
+
+_PROMPT = (
+    "You are a professional interviewer for the role of {role}. "
+    "Write {count} different opening interview questions for this role. "
+    "Each must stand on its own without any earlier conversation, and be one "
+    "or two sentences a candidate can answer aloud. "
+    "Reply with one question per line, with no numbering or extra text."
+)
+
+_manifests: Dict[str, Tuple[float, Dict]] = {}  # role key -> (mtime, bank.json)
+_lock = threading.Lock()
+
+
+def role_key(role: str) -> str:
+    """Normalized role used as the bank key: 'Software  engineer ' -> 'software-engineer'."""
+    return re.sub(r"[^a-z0-9]+", "-", (role or "").lower()).strip("-")
+
+
+def fingerprint(voice: str = VOICE, format: str = FORMAT) -> Dict:
+    """What a bank entry must have been built with to be used."""
+    return {"version": BANK_VERSION, "llm_model": llm_service.DEFAULT_MODEL,
+            "tts_model": tts_service.TTS_MODEL, "voice": voice, "format": format}
+
+
+def _role_dir(role: str) -> str:
+    return os.path.join(QUESTION_BANK_DIR, role_key(role))
+
+
+def _manifest(role: str) -> Optional[Dict]:
+    """bank.json of a role if it exists and matches the current fingerprint."""
+    key = role_key(role)
+    if not key:
+        return None
+    path = os.path.join(QUESTION_BANK_DIR, key, "bank.json")
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _lock:
+        cached = _manifests.get(key)
+    if cached is None or cached[0] != mtime:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = (mtime, json.load(f))
+        except (OSError, ValueError):
+            return None
+        with _lock:
+            _manifests[key] = cached
+    manifest = cached[1]
+    return manifest if manifest.get("fingerprint") == fingerprint() else None
+
+
+def draw(role: str, exclude: Tuple[str, ...] = ()) -> Optional[Tuple[str, bytes]]:
+    """
+    A random banked question for `role` as (text, audio), skipping texts in
+    `exclude`; None if the role has no usable entry (callers generate live).
+    """
+    if not QUESTION_BANK_ENABLED:
+        return None
+    manifest = _manifest(role)
+    if manifest is None:
+        return None
+    choices = [q for q in manifest.get("questions", []) if q["text"] not in exclude]
+    random.shuffle(choices)
+    for q in choices:
+        try:
+            with open(os.path.join(_role_dir(role), q["audio"]), "rb") as f:
+                return q["text"], f.read()
+        except OSError:
+            continue
+    return None
+
+
+def _parse_questions(reply: str) -> List[str]:
+    out: List[str] = []
+    for line in reply.splitlines():
+        line = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip().strip('"')
+        if line.endswith("?") and line not in out:
+            out.append(line)
+    return out
+
+
+def build(role: str, count: int = DEFAULT_COUNT, workers: int = 4) -> Dict:
+    """
+    Generates `count` opening questions for `role`, synthesizes each, and
+    replaces the role's entry in one step (written to a temp dir first).
+    """
+    key = role_key(role)
+    if not key:
+        raise ValueError("Role is empty")
+    reply = llm_service.chat([{"role": "user", "content": _PROMPT.format(role=role, count=count)}],
+                             cache=False)
+    questions = _parse_questions(reply)[:count]
+    if not questions:
+        raise RuntimeError(f"No questions in the model's reply: {reply[:200]!r}")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="bank") as pool:
+        audio = list(pool.map(lambda q: tts_service.synthesize_speech(q, voice=VOICE, format=FORMAT), questions))
+
+    os.makedirs(QUESTION_BANK_DIR, exist_ok=True)
+    final = os.path.join(QUESTION_BANK_DIR, key)
+    tmp = f"{final}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    entries = []
+    for i, (text, data) in enumerate(zip(questions, audio), 1):
+        name = f"q{i}.{FORMAT}"
+        with open(os.path.join(tmp, name), "wb") as f:
+            f.write(data)
+        entries.append({"text": text, "audio": name})
+    manifest = {"role": role, "key": key, "built_at": time.time(),
+                "fingerprint": fingerprint(), "questions": entries}
+    with open(os.path.join(tmp, "bank.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    old = f"{final}.old-{os.getpid()}"
+    if os.path.isdir(final):
+        os.replace(final, old)
+    os.replace(tmp, final)
+    shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+def entries() -> List[Dict]:
+    """Every role in the bank with its question count and whether it is usable."""
+    out = []
+    if not os.path.isdir(QUESTION_BANK_DIR):
+        return out
+    for key in sorted(os.listdir(QUESTION_BANK_DIR)):
+        path = os.path.join(QUESTION_BANK_DIR, key, "bank.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                m = json.load(f)
+        except (OSError, ValueError):
+            continue
+        out.append({"key": key, "role": m.get("role", key), "questions": len(m.get("questions", [])),
+                    "current": m.get("fingerprint") == fingerprint(), "built_at": m.get("built_at")})
+    return out
+
+
+def prune() -> int:
+    """Deletes entries built with another model, voice or bank version."""
+    removed = 0
+    for e in entries():
+        if not e["current"]:
+            shutil.rmtree(os.path.join(QUESTION_BANK_DIR, e["key"]), ignore_errors=True)
+            removed += 1
+    with _lock:
+        _manifests.clear()
+    return removed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Build and inspect the precomputed question bank.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="generate and synthesize questions for roles")
+    b.add_argument("role", nargs="*")
+    b.add_argument("--roles", help="text file with one role per line")
+    b.add_argument("--count", type=int, default=DEFAULT_COUNT)
+    b.add_argument("--stale", action="store_true", help="also rebuild every role whose entry is out of date")
+    sub.add_parser("list")
+    sub.add_parser("prune", help="delete entries built for another model, voice or version")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "list":
+        for e in entries():
+            print(f"{e['key']:<32} {e['questions']:>3} questions  {'current' if e['current'] else 'STALE'}")
+        return 0
+    if args.cmd == "prune":
+        print(f"Removed {prune()} stale entries")
+        return 0
+
+    roles = list(args.role)
+    if args.roles:
+        with open(args.roles, "r", encoding="utf-8") as f:
+            roles += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if args.stale:
+        roles += [e["role"] for e in entries() if not e["current"]]
+    if not roles:
+        ap.error("no roles given")
+    failed = 0
+    for role in roles:
+        try:
+            m = build(role, args.count)
+            print(f"{m['key']}: {len(m['questions'])} questions")
+        except Exception as e:
+            failed += 1
+            print(f"[ERROR] {role}: {e}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
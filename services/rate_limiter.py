@@ -0,0 +1,362 @@
+import os, time, asyncio, contextvars, threading
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict, Iterator, AsyncIterator, Optional
+
+# Process-wide admission control for OpenAI calls, shared by every Streamlit
+# session (they are threads of one process). Each endpoint has:
+#   - token buckets for requests/minute and tokens/minute (0 = unlimited)
+#   - an adaptive concurrency limit: halved on a 429 (plus a pause for the
+#     Retry-After), grown back by ~1 per `limit` successful calls
+#   - a fair queue: waiters are served by priority class, and round-robin
+#     across sessions within a class, so one busy session can't starve others
+#
+#     with rate_limiter.context(session_id, rate_limiter.INTERVIEW):
+#         ...                                  # set once per tab render
+#     with rate_limiter.slot("llm", tokens=n) as s:
+#         r = http_client.post(...)
+#         s.observe(r)
+
+# -------- Configuration --------
+RATE_LIMITS_ENABLED = os.getenv("RATE_LIMITS", "1") != "0"
+MAX_PAUSE = 60.0                 # cap on a Retry-After pause, seconds
+DEFAULT_PAUSE = 1.0              # pause after a 429 without Retry-After
+# --------------------------------
+
+# Priority classes, lower is served first
+INTERVIEW = 0
+DEFAULT = 1
+PLAYGROUND = 2
+
+_session: contextvars.ContextVar = contextvars.ContextVar("rate_session", default="default")
+_priority: contextvars.ContextVar = contextvars.ContextVar("rate_priority", default=DEFAULT)
+
+
+def _env_num(name: str, default: str) -> float:
+    return float(os.getenv(name, default))
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to a burst of `per_minute`."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.level = per_minute
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, cost: float, now: float) -> float:
+        """Seconds until `cost` units are available (0 if they are now)."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        cost = min(cost, self.capacity)  # an oversized request waits for a full bucket
+        return 0.0 if self.level >= cost else (cost - self.level) / self.rate
+
+    def take(self, cost: float) -> None:
+        if self.rate > 0:
+            self.level -= min(cost, self.capacity)
+
+
+class _Ticket:
+    __slots__ = ("session", "priority", "tokens", "granted", "cancelled")
+
+    def __init__(self, session: str, priority: int, tokens: float):
+        self.session = session
+        self.priority = priority
+        self.tokens = tokens
+        self.granted = False
+        self.cancelled = False
+
+
+class Slot:
+    """A granted request slot; report the response with observe()."""
+
+    def __init__(self, limiter: "EndpointLimiter"):
+        self._limiter = limiter
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+        self.rate_limited = False
+
+    def observe(self, r) -> None:
+        """
+        Record a requests/httpx response: its status, Retry-After, and
+        whether urllib3 already retried through a 429 to get it.
+        """
+        self.status = r.status_code
+        self.rate_limited = r.status_code == 429
+        history = getattr(getattr(getattr(r, "raw", None), "retries", None), "history", None) or ()
+        if any(getattr(h, "status", None) == 429 for h in history):
+            self.rate_limited = True
+        value = r.headers.get("Retry-After") if r.status_code == 429 else None
+        if value:
+            try:
+                self.retry_after = float(value)
+            except ValueError:
+                self.retry_after = None
+
+
+class EndpointLimiter:
+    def __init__(self, name: str, rpm: float = 0, tpm: float = 0, max_concurrency: int = 8):
+        self.name = name
+        self.rpm = TokenBucket(rpm)
+        self.tpm = TokenBucket(tpm)
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        # priority -> session -> waiting tickets (OrderedDict gives the round-robin order)
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Ticket]]"] = {}
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self._stats = {"granted": 0, "waited": 0, "rate_limited": 0, "timeouts": 0, "wait_seconds": 0.0}
+
+    # ---- acquire / release ----
+    def acquire(self, session: str, priority: int, tokens: float = 0,
+                timeout: Optional[float] = None, ticket: Optional[_Ticket] = None) -> None:
+        """
+        Blocks until a slot is granted. Pass your own `ticket` to be able to
+        abandon the wait from another thread with cancel().
+        """
+        ticket = ticket or _Ticket(session, priority, tokens)
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        with self._cond:
+            if ticket.cancelled:
+                return
+            self._queues.setdefault(priority, OrderedDict()).setdefault(session, deque()).append(ticket)
+            self._waiting += 1
+            while True:
+                delay = self._dispatch()
+                if ticket.granted:
+                    break
+                if ticket.cancelled:
+                    return  # withdrawn by cancel()
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._withdraw(ticket)
+                        self._stats["timeouts"] += 1
+                        raise TimeoutError(f"{self.name}: no request slot within {timeout:g}s")
+                    delay = remaining if delay is None else min(delay, remaining)
+                self._cond.wait(delay)
+            waited = time.monotonic() - start
+            if waited > 0.001:
+                self._stats["waited"] += 1
+                self._stats["wait_seconds"] += waited
+
+    def try_acquire(self, tokens: float = 0) -> bool:
+        """
+        Takes a slot only if one is free right now and nobody is queued, so
+        optional extra calls (hedges) never delay or jump ahead of real ones.
+        """
+        with self._cond:
+            now = time.monotonic()
+            if (self._waiting or self.in_flight >= int(self.limit) or now < self.paused_until
+                    or self.rpm.wait_time(1, now) > 0 or self.tpm.wait_time(tokens, now) > 0):
+                return False
+            self.rpm.take(1)
+            self.tpm.take(tokens)
+            self.in_flight += 1
+            self._stats["granted"] += 1
+            return True
+
+    def cancel(self, ticket: _Ticket) -> None:
+        """
+        Abandons a wait started with acquire(ticket=...): the ticket leaves
+        the queue, or its slot is handed back if it was granted meanwhile.
+        """
+        with self._cond:
+            ticket.cancelled = True
+            if ticket.granted:
+                self.in_flight -= 1
+                self._dispatch()
+            self._withdraw(ticket)
+
+    def release(self, slot: Slot) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if slot.rate_limited:
+                self._stats["rate_limited"] += 1
+                self.limit = max(1.0, self.limit / 2)
+                # Pause everyone only if the call gave up on a 429; one that got
+                # through after a retry has already waited out its Retry-After
+                if slot.status == 429:
+                    pause = slot.retry_after if slot.retry_after is not None else DEFAULT_PAUSE
+                    self.paused_until = max(self.paused_until, time.monotonic() + min(pause, MAX_PAUSE))
+            elif slot.status is not None and slot.status < 400:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            self._dispatch()
+            self._cond.notify_all()
+
+    # ---- scheduling (caller holds the lock) ----
+    def _dispatch(self) -> Optional[float]:
+        """
+        Grants tickets while capacity allows. Returns how long the next
+        waiter has to wait for buckets or a pause (None: wait for a release).
+        """
+        granted = False
+        delay: Optional[float] = None
+        while self._waiting and self.in_flight < int(self.limit):
+            now = time.monotonic()
+            if now < self.paused_until:
+                delay = self.paused_until - now
+                break
+            ticket = self._peek()
+            wait = max(self.rpm.wait_time(1, now), self.tpm.wait_time(ticket.tokens, now))
+            if wait > 0:
+                delay = wait
+                break
+            self._pop()
+            self.rpm.take(1)
+            self.tpm.take(ticket.tokens)
+            self.in_flight += 1
+            self._stats["granted"] += 1
+            ticket.granted = True
+            granted = True
+        if granted:
+            self._cond.notify_all()
+        return delay
+
+    def _next_queue(self) -> "OrderedDict[str, Deque[_Ticket]]":
+        return next(self._queues[p] for p in sorted(self._queues) if self._queues[p])
+
+    def _peek(self) -> _Ticket:
+        sessions = self._next_queue()
+        return sessions[next(iter(sessions))][0]
+
+    def _pop(self) -> None:
+        sessions = self._next_queue()
+        session, tickets = next(iter(sessions.items()))
+        tickets.popleft()
+        # Round-robin: the session goes to the back of its class
+        sessions.pop(session)
+        if tickets:
+            sessions[session] = tickets
+        self._waiting -= 1
+
+    def _withdraw(self, ticket: _Ticket) -> None:
+        sessions = self._queues.get(ticket.priority, {})
+        tickets = sessions.get(ticket.session)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            self._waiting -= 1
+            if not tickets:
+                sessions.pop(ticket.session)
+        self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            out = dict(self._stats)
+            out.update(limit=round(self.limit, 2), in_flight=self.in_flight, waiting=self._waiting,
+                       paused_for=max(0.0, round(self.paused_until - time.monotonic(), 2)))
+        return out
+
+
+def _build(name: str, rpm: str, tpm: str, concurrency: str) -> EndpointLimiter:
+    key = name.upper()
+    return EndpointLimiter(
+        name,
+        rpm=_env_num(f"RATE_{key}_RPM", rpm),
+        tpm=_env_num(f"RATE_{key}_TPM", tpm),
+        max_concurrency=int(_env_num(f"RATE_{key}_CONCURRENCY", concurrency)),
+    )
+
+
+# Defaults sit under OpenAI's lower paid tiers; override per deployment
+_limiters: Dict[str, EndpointLimiter] = {
+    "llm": _build("llm", "500", "200000", "16"),
+    "stt": _build("stt", "500", "0", "8"),
+    "tts": _build("tts", "500", "0", "8"),
+}
+
+
+def limiter(endpoint: str) -> EndpointLimiter:
+    return _limiters[endpoint]
+
+
+@contextmanager
+def context(session: str, priority: int = DEFAULT) -> Iterator[None]:
+    """Tag calls made inside the block (and in contexts copied from it)."""
+    s_tok, p_tok = _session.set(session), _priority.set(priority)
+    try:
+        yield
+    finally:
+        _session.reset(s_tok)
+        _priority.reset(p_tok)
+
+
+@contextmanager
+def slot(endpoint: str, tokens: float = 0, timeout: Optional[float] = None) -> Iterator[Slot]:
+    """Waits for a request slot on `endpoint`, held until the block exits."""
+    if not RATE_LIMITS_ENABLED:
+        yield Slot(_limiters[endpoint])
+        return
+    lim = _limiters[endpoint]
+    lim.acquire(_session.get(), _priority.get(), tokens, timeout)
+    s = Slot(lim)
+    try:
+        yield s
+    finally:
+        lim.release(s)
+
+
+@asynccontextmanager
+async def aslot(endpoint: str, tokens: float = 0, timeout: Optional[float] = None) -> AsyncIterator[Slot]:
+    """
+    Coroutine variant of `slot`; waiting happens off the event loop. A
+    cancelled waiter leaves the queue (or returns a slot granted meanwhile)
+    and frees its worker thread.
+    """
+    if not RATE_LIMITS_ENABLED:
+        yield Slot(_limiters[endpoint])
+        return
+    lim = _limiters[endpoint]
+    ticket = _Ticket(_session.get(), _priority.get(), tokens)
+    try:
+        await asyncio.to_thread(lim.acquire, ticket.session, ticket.priority, tokens, timeout, ticket)
+    except asyncio.CancelledError:
+        lim.cancel(ticket)
+        raise
+    s = Slot(lim)
+    try:
+        yield s
+    finally:
+        lim.release(s)
+
+
+def try_slot(endpoint: str, tokens: float = 0) -> Optional[Slot]:
+    """A slot if one is free without waiting, else None; hand it back with release()."""
+    lim = _limiters[endpoint]
+    if not RATE_LIMITS_ENABLED or lim.try_acquire(tokens):
+        return Slot(lim)
+    return None
+
+
+def release(slot: Slot) -> None:
+    if RATE_LIMITS_ENABLED:
+        slot._limiter.release(slot)
+
+
+def total_concurrency() -> int:
+    """Calls all endpoints may have in flight at once (sizes the shared HTTP pool)."""
+    return sum(lim.max_concurrency for lim in _limiters.values())
+
+
+def current_session() -> str:
+    """Session tag of the calling context (set by `context`), "default" outside one."""
+    return _session.get()
+
+
+def estimate_tokens(messages, max_tokens: Optional[int] = None) -> int:
+    """Rough TPM cost of a chat request: ~4 chars per token plus the reply budget."""
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + 4 * len(messages) + (max_tokens or 256)
+
+
+def stats() -> Dict[str, Dict]:
+    return {name: lim.stats() for name, lim in _limiters.items()}
@@ -0,0 +1,143 @@
+import os, re, contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from services import tts_service
+except ImportError:  # executed directly: python services/speech_pipeline.py
+    import tts_service  # type: ignore
+
+# -------- Configuration --------
+PIPELINE_WORKERS = int(os.getenv("TTS_PIPELINE_WORKERS", "3"))
+MIN_SENTENCE_CHARS = int(os.getenv("TTS_MIN_SENTENCE_CHARS", "40"))
+# The first sentence goes to TTS as soon as it ends, however short, so the first clip starts early
+FIRST_SENTENCE_CHARS = int(os.getenv("TTS_FIRST_SENTENCE_CHARS", "0"))
+# --------------------------------
+
+# End of a sentence: terminal punctuation, optional closing quote/bracket, then whitespace
+_SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+")
+
+
+def iter_sentences(tokens: Iterable[str], min_chars: int = MIN_SENTENCE_CHARS) -> Iterator[str]:
+    """
+    Regroup a token stream into sentences as soon as each one is complete.
+    Sentences shorter than `min_chars` are merged with the next one so very
+    short fragments ("Great.") don't each cost a TTS round-trip.
+    """
+    buf = ""
+    for token in tokens:
+        buf += token
+        done, buf = _split(buf, lambda _: min_chars)
+        yield from done
+    tail = buf.strip()
+    if tail:
+        yield tail
+
+
+def _split(buf: str, min_chars: Callable[[int], int]) -> Tuple[List[str], str]:
+    """
+    Complete sentences at the start of `buf` and the unfinished rest.
+    `min_chars(n)` is the merge threshold for the n-th sentence cut here.
+    """
+    done: List[str] = []
+    cut = 0
+    for m in _SENTENCE_END.finditer(buf):
+        if m.end() - cut >= min_chars(len(done)):
+            chunk = buf[cut:m.end()].strip()
+            if chunk:
+                done.append(chunk)
+            cut = m.end()
+    return done, buf[cut:]
+
+
+class SpeechPipeline:
+    """
+    Synthesizes sentences of a streamed reply concurrently while the LLM is
+    still generating, and hands the audio segments back in reply order.
+
+        pipe = SpeechPipeline()
+        for token in pipe.feed(llm_service.chat_stream(messages)):
+            show(token)
+            for segment in pipe.ready():
+                play(segment)
+        for segment in pipe.drain():
+            play(segment)
+        audio = pipe.audio()   # whole reply as one clip
+    """
+
+    def __init__(self, synthesize: Optional[Callable[[str], bytes]] = None,
+                 max_workers: int = PIPELINE_WORKERS, min_chars: int = MIN_SENTENCE_CHARS,
+                 first_min_chars: int = FIRST_SENTENCE_CHARS):
+        self._synthesize = synthesize or tts_service.synthesize_speech
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                        thread_name_prefix="tts-pipeline")
+        self._min_chars = min_chars
+        self._first_min_chars = first_min_chars
+        self._futures: List[Future] = []
+        self._segments: List[bytes] = []
+        self.sentences: List[str] = []
+        self.text = ""
+
+    def _submit(self, sentence: str) -> None:
+        self.sentences.append(sentence)
+        # Run in a copy of the caller's context so rate-limiter tags (session, priority) follow
+        self._futures.append(self._pool.submit(contextvars.copy_context().run, self._synthesize, sentence))
+
+    def feed(self, tokens: Iterable[str]) -> Iterator[str]:
+        """
+        Pass each token through as soon as it arrives, queueing TTS for every
+        sentence it completes (sentences are found on a separate buffer).
+        """
+        def threshold(n: int) -> int:
+            return self._first_min_chars if not self.sentences and n == 0 else self._min_chars
+
+        buf = ""
+        try:
+            for token in tokens:
+                self.text += token
+                buf += token
+                done, buf = _split(buf, threshold)
+                for sentence in done:
+                    self._submit(sentence)
+                yield token
+            tail = buf.strip()
+            if tail:
+                self._submit(tail)
+        except BaseException:
+            self.close()
+            raise
+
+    def ready(self) -> Iterator[bytes]:
+        """Yield the next in-order segments that have finished, without blocking."""
+        while len(self._segments) < len(self._futures):
+            fut = self._futures[len(self._segments)]
+            if not fut.done():
+                return
+            yield self._take(fut)
+
+    def drain(self) -> Iterator[bytes]:
+        """Yield all remaining segments in order, waiting for each one."""
+        while len(self._segments) < len(self._futures):
+            yield self._take(self._futures[len(self._segments)])
+        self._pool.shutdown(wait=False)
+
+    def _take(self, fut: Future) -> bytes:
+        try:
+            seg = fut.result()
+        except BaseException:
+            self.close()
+            raise
+        self._segments.append(seg)
+        return seg
+
+    def audio(self) -> bytes:
+        """The whole reply as one clip (MP3 frames concatenate cleanly)."""
+        for _ in self.drain():
+            pass
+        return b"".join(self._segments)
+
+    def close(self) -> None:
+        """Cancel segments that have not started and release the workers."""
+        for fut in self._futures:
+            fut.cancel()
+        self._pool.shutdown(wait=False)
@@ -1,5 +1,11 @@
-import os, sys, requests
-from typing import Optional
+import os, sys, asyncio, contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+try:
+    from services import http_client, async_client, audio_preprocess, metrics, rate_limiter, hedging
+except ImportError:  # executed directly: python services/stt_service.py
+    import http_client, async_client, audio_preprocess, metrics, rate_limiter, hedging  # type: ignore
 
 try:
     from dotenv import load_dotenv  # type: ignore
@@ -9,8 +15,19 @@ except Exception:
 
 # Default to whisper-1 (works with /audio/transcriptions)
 STT_MODEL = os.getenv("STT_MODEL", "whisper-1")
-STT_ENDPOINT = "https://api.openai.com/v1/audio/transcriptions"
+API_BASE = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+STT_ENDPOINT = f"{API_BASE}/audio/transcriptions"
 STT_TIMEOUT = 120
+# Downmix/resample/trim in-memory WAV uploads before sending (needs NumPy)
+STT_PREPROCESS = os.getenv("STT_PREPROCESS", "1") != "0"
+# In-memory WAV longer than STT_CHUNK_SECONDS is cut at pauses and the
+# pieces are transcribed in parallel (STT_CHUNKED=0 sends it whole)
+STT_CHUNKED = os.getenv("STT_CHUNKED", "1") != "0"
+STT_CHUNK_SECONDS = float(os.getenv("STT_CHUNK_SECONDS", "30"))
+STT_CHUNK_WORKERS = int(os.getenv("STT_CHUNK_WORKERS", "8"))
+PROMPT_TAIL_CHARS = 200  # previous piece's text carried into the next piece's prompt
+
+AudioInput = Union[str, bytes, bytearray, memoryview, BinaryIO]
 
 
 def _api_key() -> str:
@@ -20,19 +37,7 @@ def _api_key() -> str:
     return k
 
 
-def transcribe_audio(
-    file_path: str,
-    model: str = STT_MODEL,
-    language: Optional[str] = None,
-    prompt: Optional[str] = None,
-) -> str:
-    """Send audio file to OpenAI STT (Whisper-1)."""
-
-    if not file_path:
-        raise ValueError("file_path is empty")
-    if not os.path.isfile(file_path):
-        raise FileNotFoundError(f"Audio file not found: {file_path}")
-
+def _form(model: str, language: Optional[str], prompt: Optional[str]) -> Dict[str, str]:
     # Only whisper-1 is supported here
     if not model.startswith("whisper"):
         model = "whisper-1"
@@ -42,19 +47,106 @@ def transcribe_audio(
         data["language"] = language
     if prompt:
         data["prompt"] = prompt
+    return data
+
+
+# Whisper picks the decoder from the upload's file name, so in-memory audio
+# gets a name that matches its container
+_MAGIC = (
+    (b"RIFF", "wav"),
+    (b"ID3", "mp3"),
+    (b"\xff\xfb", "mp3"),
+    (b"\xff\xf3", "mp3"),
+    (b"OggS", "ogg"),
+    (b"fLaC", "flac"),
+    (b"\x1a\x45\xdf\xa3", "webm"),
+)
+
+
+def _guess_name(head: bytes) -> str:
+    for magic, ext in _MAGIC:
+        if head.startswith(magic):
+            return f"audio.{ext}"
+    return "audio.wav"
+
+
+def _open_upload(audio: AudioInput, filename: Optional[str]) -> Tuple[str, Any, Optional[BinaryIO]]:
+    """
+    Resolve the accepted inputs to (upload name, body, file to close).
+    Bytes-like bodies are handed to the multipart encoder as-is (no copy);
+    a path is opened and streamed from disk.
+    """
+    if isinstance(audio, str):
+        if not audio:
+            raise ValueError("file_path is empty")
+        if not os.path.isfile(audio):
+            raise FileNotFoundError(f"Audio file not found: {audio}")
+        f = open(audio, "rb")
+        return filename or os.path.basename(audio), f, f
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        if not len(audio):
+            raise ValueError("Audio is empty")
+        return filename or _guess_name(bytes(audio[:4])), audio, None
+    if hasattr(audio, "read"):
+        name = filename or os.path.basename(getattr(audio, "name", "") or "") or "audio.wav"
+        return name, audio, None
+    raise TypeError(f"Unsupported audio input: {type(audio).__name__}")
+
+
+def _maybe_preprocess(body, enabled: Optional[bool]):
+    """Shrink in-memory WAV bodies; paths and file objects are sent untouched."""
+    if enabled is None:
+        enabled = STT_PREPROCESS
+    if not enabled or not isinstance(body, (bytes, bytearray, memoryview)):
+        return body
+    out, _ = audio_preprocess.preprocess_wav(body)
+    return out
+
+
+def preprocess_stats() -> Dict[str, float]:
+    """Cumulative upload preprocessing counters (bytes saved, time spent)."""
+    return audio_preprocess.totals()
+
+
+def _chunks(audio: AudioInput, chunked: Optional[bool], preprocess: Optional[bool]) -> Optional[List[bytes]]:
+    """
+    Pieces of a long in-memory WAV, or None to send the audio as it is.
+    With preprocessing off the pieces keep the original samples and format.
+    """
+    if chunked is None:
+        chunked = STT_CHUNKED
+    if not chunked or not isinstance(audio, (bytes, bytearray, memoryview)):
+        return None
+    if preprocess is None:
+        preprocess = STT_PREPROCESS
+    return audio_preprocess.split_wav(audio, STT_CHUNK_SECONDS, preprocess=preprocess)
+
+
+def _chains(n: int, workers: int) -> List[range]:
+    """
+    Splits pieces 0..n-1 into at most `workers` runs of at least two
+    consecutive pieces. Runs are transcribed in parallel; within a run each
+    piece is prompted with the previous piece's text, so the prompts don't
+    depend on timing.
+    """
+    size = max(2, -(-n // max(1, workers)))
+    return [range(i, min(i + size, n)) for i in range(0, n, size)]
+
+
+def _chunk_prompt(prompt: Optional[str], previous: Optional[str]) -> Optional[str]:
+    """The caller's prompt plus the tail of the previous piece's text, if it is known yet."""
+    if not previous:
+        return prompt
+    tail = previous[-PROMPT_TAIL_CHARS:]
+    return f"{prompt} {tail}" if prompt else tail
+
+
+def _stitch(texts: List[str]) -> str:
+    return " ".join(t for t in texts if t)
 
-    with open(file_path, "rb") as f:
-        files = {
-            "file": (os.path.basename(file_path), f, "application/octet-stream")
-        }
-        r = requests.post(
-            STT_ENDPOINT,
-            headers={"Authorization": f"Bearer {_api_key()}"},
-            data=data,
-            files=files,
-            timeout=STT_TIMEOUT,
-        )
 
+def _parse(r) -> str:
+    """Shared by the requests and httpx paths (same response surface)."""
     if r.status_code != 200:
         raise RuntimeError(f"STT {r.status_code}: {r.text[:500]}")
 
@@ -65,6 +157,145 @@ def transcribe_audio(
     return text.strip()
 
 
+def transcribe_audio(
+    audio: AudioInput,
+    model: str = STT_MODEL,
+    language: Optional[str] = None,
+    prompt: Optional[str] = None,
+    filename: Optional[str] = None,
+    preprocess: Optional[bool] = None,
+    chunked: Optional[bool] = None,
+) -> str:
+    """
+    Send audio to OpenAI STT (Whisper-1).
+    `audio` is a file path, raw bytes / memoryview, or a binary file-like object;
+    `filename` overrides the upload name Whisper uses to detect the format.
+    In-memory WAV is downmixed to 16 kHz mono with edge silence trimmed first
+    unless `preprocess=False` (default from STT_PREPROCESS). One longer than
+    STT_CHUNK_SECONDS is split and transcribed in parallel unless
+    `chunked=False` (default from STT_CHUNKED).
+    """
+
+    chunks = _chunks(audio, chunked, preprocess)
+    if chunks:
+        return _transcribe_chunks(chunks, model, language, prompt)
+
+    name, body, opened = _open_upload(audio, filename)
+    body = _maybe_preprocess(body, preprocess)
+    data = _form(model, language, prompt)
+
+    with metrics.span("stt", "transcribe") as s:
+        try:
+            if s.on and isinstance(body, (bytes, bytearray, memoryview)):
+                s.bytes_out = len(body)
+            elif s.on and opened is not None:
+                s.bytes_out = os.fstat(opened.fileno()).st_size
+            files = {"file": (name, body, "application/octet-stream")}
+            with rate_limiter.slot("stt") as slot:
+                r = hedging.post(
+                    "stt",
+                    STT_ENDPOINT,
+                    hedge=opened is None and not hasattr(body, "read"),  # a file can only be sent once
+                    headers={"Authorization": f"Bearer {_api_key()}"},
+                    data=data,
+                    files=files,
+                    timeout=STT_TIMEOUT,
+                )
+                slot.observe(r)
+        finally:
+            if opened is not None:
+                opened.close()
+        if s.on:
+            s.status = r.status_code
+            s.bytes_in = len(r.content)
+            s.retries = http_client.retries(r)
+        return _parse(r)
+
+
+def _transcribe_chunks(chunks: List[bytes], model: str, language: Optional[str],
+                       prompt: Optional[str]) -> str:
+    """
+    Transcribes pieces on a bounded pool and joins the text in order. Each
+    worker takes one run of consecutive pieces (_chains); the first piece of
+    a run gets the caller's prompt, the others also the previous piece's text.
+    """
+    texts: List[Optional[str]] = [None] * len(chunks)
+
+    def run(chain: range) -> None:
+        for i in chain:
+            p = _chunk_prompt(prompt, texts[i - 1] if i != chain.start else None)
+            texts[i] = transcribe_audio(chunks[i], model, language, p, filename=f"part-{i + 1}.wav",
+                                        preprocess=False, chunked=False)
+
+    chains = _chains(len(chunks), STT_CHUNK_WORKERS)
+    with metrics.span("stt", "chunked") as s:
+        s.bytes_out = sum(len(c) for c in chunks)
+        with ThreadPoolExecutor(max_workers=len(chains), thread_name_prefix="stt-chunk") as pool:
+            futures = [pool.submit(contextvars.copy_context().run, run, c) for c in chains]
+            try:
+                for f in futures:
+                    f.result()
+                return _stitch(texts)
+            except Exception:
+                for f in futures:
+                    f.cancel()
+                raise
+
+
+async def atranscribe_audio(
+    audio: AudioInput,
+    model: str = STT_MODEL,
+    language: Optional[str] = None,
+    prompt: Optional[str] = None,
+    filename: Optional[str] = None,
+    preprocess: Optional[bool] = None,
+    chunked: Optional[bool] = None,
+) -> str:
+    """Coroutine version of `transcribe_audio`; shares one async connection pool per event loop."""
+
+    if chunked is not False and isinstance(audio, (bytes, bytearray, memoryview)):
+        chunks = await asyncio.to_thread(_chunks, audio, chunked, preprocess)
+        if chunks:
+            texts: List[Optional[str]] = [None] * len(chunks)
+
+            async def run(chain: range) -> None:
+                for i in chain:
+                    p = _chunk_prompt(prompt, texts[i - 1] if i != chain.start else None)
+                    texts[i] = await atranscribe_audio(chunks[i], model, language, p, filename=f"part-{i + 1}.wav",
+                                                       preprocess=False, chunked=False)
+
+            await asyncio.gather(*(run(c) for c in _chains(len(chunks), STT_CHUNK_WORKERS)))
+            return _stitch(texts)
+
+    name, body, opened = _open_upload(audio, filename)
+    if opened is None and isinstance(body, (bytes, bytearray, memoryview)):
+        body = await asyncio.to_thread(_maybe_preprocess, body, preprocess)
+    data = _form(model, language, prompt)
+
+    if opened is not None or hasattr(body, "read"):
+        def read() -> bytes:
+            try:
+                return body.read()
+            finally:
+                if opened is not None:
+                    opened.close()
+        body = await asyncio.to_thread(read)
+    elif not isinstance(body, bytes):
+        body = bytes(body)  # httpx only encodes bytes or file objects
+
+    async with rate_limiter.aslot("stt") as slot:
+        r = await async_client.post(
+            STT_ENDPOINT,
+            headers={"Authorization": f"Bearer {_api_key()}"},
+            data=data,
+            files={"file": (name, body, "application/octet-stream")},
+            timeout=STT_TIMEOUT,
+        )
+        slot.observe(r)
+
+    return _parse(r)
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python services/stt_service.py path/to/audio", file=sys.stderr)
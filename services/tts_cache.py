@@ -0,0 +1,277 @@
+import os, re, hashlib, tempfile, threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, Optional
+
+try:
+    from dotenv import load_dotenv  # type: ignore
+    load_dotenv()
+except Exception:
+    pass
+
+# -------- Configuration --------
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE", "1") != "0"
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(_ROOT, ".cache", "tts"))
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+# --------------------------------
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different spellings share an entry."""
+    return _WS.sub(" ", text).strip()
+
+
+def cache_key(model: str, voice: str, format: str, text: str) -> str:
+    raw = "\x1f".join((model, voice, format, normalize_text(text)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Content-addressed audio cache: a byte-bounded in-memory LRU in front of
+    a directory of `<key>.<format>` files with its own byte budget. Disk
+    entries are evicted least-recently-used first (hits refresh the mtime).
+    """
+
+    def __init__(self, directory: str = TTS_CACHE_DIR,
+                 memory_bytes: int = TTS_CACHE_MEMORY_BYTES,
+                 disk_bytes: int = TTS_CACHE_DISK_BYTES):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._mem_size = 0
+        self._disk_size: Optional[int] = None  # computed lazily on first write
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    # ---- public API ----
+    def get(self, key: str, format: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return data
+        path = self._path(key, format)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, None)
+        except OSError:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._stats["disk_hits"] += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, format: str, data: bytes) -> None:
+        with self._lock:
+            self._remember(key, data)
+        if self.disk_bytes <= 0 or len(data) > self.disk_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key, format)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)  # readers never see a partial file
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = self._scan_disk()
+            else:
+                self._disk_size += len(data)
+            if self._disk_size > self.disk_bytes:
+                self._evict_disk()
+
+    def get_stream(self, key: str, format: str, chunk_size: int) -> Optional[Iterator[bytes]]:
+        """
+        Like `get`, but a disk hit is read `chunk_size` bytes at a time
+        instead of loaded whole (and not promoted to memory).
+        """
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self._stats["memory_hits"] += 1
+        if data is not None:
+            return (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+        path = self._path(key, format)
+        try:
+            os.utime(path, None)
+        except OSError:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._stats["disk_hits"] += 1
+
+        def read() -> Iterator[bytes]:
+            # Opened on first iteration, so a hit that is never read holds no file
+            with open(path, "rb") as f:
+                yield from iter(lambda: f.read(chunk_size), b"")
+        return read()
+
+    def put_stream(self, key: str, format: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Passes `chunks` through while spooling them to a temp file, which
+        becomes the disk entry once the stream has been fully consumed.
+        Nothing is stored if the consumer stops early or the stream fails;
+        disk errors only skip caching.
+        """
+        f = None
+        if self.disk_bytes > 0:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+                f = os.fdopen(fd, "wb")
+            except OSError:
+                f = None
+        size = 0
+        complete = False
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                if f is not None:
+                    try:
+                        f.write(chunk)
+                    except OSError:
+                        f.close()
+                        f = None
+                        _remove(tmp)
+                yield chunk
+            complete = True
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()  # release the upstream response when we stop early
+            if f is not None:
+                f.close()
+                stored = False
+                if complete and size <= self.disk_bytes:
+                    try:
+                        os.replace(tmp, self._path(key, format))  # readers never see a partial file
+                        stored = True
+                    except OSError:
+                        pass
+                if not stored:
+                    _remove(tmp)
+                else:
+                    with self._lock:
+                        if self._disk_size is None:
+                            self._disk_size = self._scan_disk()
+                        else:
+                            self._disk_size += size
+                        if self._disk_size > self.disk_bytes:
+                            self._evict_disk()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out: Dict[str, float] = dict(self._stats)
+            out["memory_entries"] = len(self._mem)
+            out["memory_bytes"] = self._mem_size
+            out["disk_bytes"] = self._disk_size if self._disk_size is not None else -1
+        lookups = out["memory_hits"] + out["disk_hits"] + out["misses"]
+        out["hit_rate"] = (out["memory_hits"] + out["disk_hits"]) / lookups if lookups else 0.0
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._mem_size = 0
+            for name in self._listdir():
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+            self._disk_size = 0
+
+    # ---- internals (call with the lock held) ----
+    def _path(self, key: str, format: str) -> str:
+        return os.path.join(self.directory, f"{key}.{format}")
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_size -= len(old)
+        self._mem[key] = data
+        self._mem_size += len(data)
+        while self._mem_size > self.memory_bytes:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_size -= len(evicted)
+
+    def _listdir(self):
+        try:
+            return [n for n in os.listdir(self.directory) if not n.endswith(".tmp")]
+        except OSError:
+            return []
+
+    def _scan_disk(self) -> int:
+        total = 0
+        for name in self._listdir():
+            try:
+                total += os.path.getsize(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        return total
+
+    def _evict_disk(self) -> None:
+        entries = []
+        for name in self._listdir():
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        total = sum(e[1] for e in entries)
+        # Evict down to 90% of the budget so we don't rescan on every write
+        target = int(self.disk_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self._stats["evictions"] += 1
+            except OSError:
+                pass
+        self._disk_size = total
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_default: Optional[TTSCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> Optional[TTSCache]:
+    """Process-wide cache used by `tts_service.synthesize_speech` (None when disabled)."""
+    global _default
+    if not TTS_CACHE_ENABLED:
+        return None
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = TTSCache()
+    return _default
@@ -0,0 +1,153 @@
+import os, time, contextvars, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    from services import tts_service
+except ImportError:  # executed directly: python services/tts_prefetch.py
+    import tts_service  # type: ignore
+
+# -------- Configuration --------
+PREFETCH_WORKERS = int(os.getenv("TTS_PREFETCH_WORKERS", "2"))
+PREFETCH_TTL = float(os.getenv("TTS_PREFETCH_TTL", "3600"))  # seconds an unclaimed prefetch is kept
+# --------------------------------
+
+_Key = Tuple[str, str, str, str]
+
+
+class TTSPrefetcher:
+    """
+    Speculatively synthesizes utterances whose text is already fixed (the
+    interview opener and closer) so the UI gets the audio without waiting.
+
+        prefetcher.prefetch(closer)       # as soon as the text is known
+        ...
+        audio = prefetcher.take(closer)   # ready bytes, or waits / synthesizes
+
+    take() on a text that was never prefetched (or whose prefetch failed)
+    simply synthesizes it, so callers don't need a fallback path. Prefetches
+    that are no longer needed should be cancelled; unclaimed ones expire
+    after PREFETCH_TTL seconds. Results also land in the TTS cache.
+    """
+
+    def __init__(self, max_workers: int = PREFETCH_WORKERS, ttl: float = PREFETCH_TTL):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                        thread_name_prefix="tts-prefetch")
+        self._ttl = ttl
+        self._jobs: Dict[_Key, Tuple[Future, float]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"prefetched": 0, "hits": 0, "waited": 0, "misses": 0,
+                       "failed": 0, "cancelled": 0, "expired": 0}
+
+    # ---- public API ----
+    def prefetch(self, text: str, model: str = tts_service.TTS_MODEL, voice: str = "alloy",
+                 format: str = "mp3") -> None:
+        """Starts synthesizing `text` in the background (no-op if already queued)."""
+        if not text or not text.strip():
+            return
+        key = (model, voice, format, text)
+        with self._lock:
+            self._expire()
+            if key in self._jobs:
+                return
+            future = self._pool.submit(contextvars.copy_context().run,
+                                       tts_service.synthesize_speech, text, model, voice, format)
+            self._jobs[key] = (future, time.monotonic())
+            self._stats["prefetched"] += 1
+
+    def take(self, text: str, model: str = tts_service.TTS_MODEL, voice: str = "alloy",
+             format: str = "mp3", timeout: Optional[float] = None) -> bytes:
+        """
+        Returns the audio for `text`, claiming its prefetch if there is one.
+        Raises like tts_service.synthesize_speech if synthesis fails.
+        """
+        key = (model, voice, format, text)
+        with self._lock:
+            job = self._jobs.pop(key, None)
+        if job is not None:
+            future = job[0]
+            ready = future.done()
+            try:
+                audio = future.result(timeout=timeout)
+            except Exception:
+                with self._lock:
+                    self._stats["failed"] += 1
+            else:
+                with self._lock:
+                    self._stats["hits" if ready else "waited"] += 1
+                return audio
+        else:
+            with self._lock:
+                self._stats["misses"] += 1
+        return tts_service.synthesize_speech(text, model, voice, format)
+
+    def cancel(self, texts: Optional[Iterable[str]] = None) -> int:
+        """
+        Drops prefetches for `texts` (all of them if None). Jobs that have not
+        started are cancelled; running ones finish into the TTS cache only.
+        Returns how many were dropped.
+        """
+        with self._lock:
+            if texts is None:
+                keys = list(self._jobs)
+            else:
+                wanted = set(texts)
+                keys = [k for k in self._jobs if k[3] in wanted]
+            for k in keys:
+                self._jobs.pop(k)[0].cancel()
+            self._stats["cancelled"] += len(keys)
+        return len(keys)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def stats(self) -> Dict:
+        """
+        Counters plus hit_rate: share of prefetched takes served from a
+        prefetch (ready = hits, still running = waited) among all takes.
+        """
+        with self._lock:
+            out = dict(self._stats)
+            out["pending"] = len(self._jobs)
+        taken = out["hits"] + out["waited"] + out["misses"] + out["failed"]
+        out["hit_rate"] = (out["hits"] + out["waited"]) / taken if taken else 0.0
+        return out
+
+    # ---- internals ----
+    def _expire(self) -> None:
+        """Drop unclaimed jobs older than the TTL (caller holds the lock)."""
+        cutoff = time.monotonic() - self._ttl
+        for k in [k for k, (_, started) in self._jobs.items() if started < cutoff]:
+            self._jobs.pop(k)[0].cancel()
+            self._stats["expired"] += 1
+
+
+_default: Optional[TTSPrefetcher] = None
+_default_lock = threading.Lock()
+
+
+def default_prefetcher() -> TTSPrefetcher:
+    """Process-wide prefetcher shared by all sessions."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = TTSPrefetcher()
+    return _default
+
+
+def prefetch(text: str, **kwargs) -> None:
+    default_prefetcher().prefetch(text, **kwargs)
+
+
+def take(text: str, **kwargs) -> bytes:
+    return default_prefetcher().take(text, **kwargs)
+
+
+def cancel(texts: Optional[Iterable[str]] = None) -> int:
+    return default_prefetcher().cancel(texts)
+
+
+def stats() -> Dict:
+    return default_prefetcher().stats()
@@ -1,5 +1,10 @@
-import os, sys, requests
-from typing import Optional
+import os, sys, asyncio
+from typing import Dict, Iterator, Optional
+
+try:
+    from services import http_client, async_client, tts_cache, metrics, rate_limiter, hedging
+except ImportError:  # executed directly: python services/tts_service.py
+    import http_client, async_client, tts_cache, metrics, rate_limiter, hedging  # type: ignore
 
 try:
     from dotenv import load_dotenv  # type: ignore
@@ -8,8 +13,10 @@ except Exception:
     pass
 
 TTS_MODEL = os.getenv("TTS_MODEL", "gpt-4o-mini-tts")
-TTS_ENDPOINT = "https://api.openai.com/v1/audio/speech"
+API_BASE = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+TTS_ENDPOINT = f"{API_BASE}/audio/speech"
 TTS_TIMEOUT = 120
+TTS_STREAM_CHUNK = int(os.getenv("TTS_STREAM_CHUNK", str(16 * 1024)))  # bytes per chunk from stream_speech
 
 
 def _api_key() -> str:
@@ -20,20 +27,144 @@ def _api_key() -> str:
 
 
 def synthesize_speech(
-    text: str, model: str = TTS_MODEL, voice: str = "alloy", format: str = "mp3"
+    text: str, model: str = TTS_MODEL, voice: str = "alloy", format: str = "mp3",
+    cache: bool = True,
+) -> bytes:
+    """
+    Send text to OpenAI TTS and return audio bytes.
+    Results are cached by (model, voice, format, normalized text) unless
+    `cache=False` or TTS_CACHE=0, so repeated phrases skip the API call.
+    """
+    if not text or not text.strip():
+        raise ValueError("Text is empty")
+
+    with metrics.span("tts", "synthesize") as s:
+        store = tts_cache.default_cache() if cache else None
+        if store is not None:
+            key = tts_cache.cache_key(model, voice, format, text)
+            hit = store.get(key, format)
+            if hit is not None:
+                s.status = "cache_hit"
+                return hit
+            audio = _request_speech(text, model, voice, format, s)
+            store.put(key, format, audio)
+            return audio
+        return _request_speech(text, model, voice, format, s)
+
+
+def stream_speech(
+    text: str, model: str = TTS_MODEL, voice: str = "alloy", format: str = "mp3",
+    cache: bool = True, chunk_size: int = TTS_STREAM_CHUNK,
+) -> Iterator[bytes]:
+    """
+    Like `synthesize_speech`, but yields the audio in chunks of up to
+    `chunk_size` bytes as they arrive, so playback or a file write can start
+    on the first chunk and the whole clip is never held in memory:
+
+        with open("reply.mp3", "wb") as f:
+            for chunk in stream_speech(text):
+                f.write(chunk)
+
+    Shares the cache with `synthesize_speech`: hits are read back in chunks,
+    and a fully consumed stream is stored for next time.
+    """
+    if not text or not text.strip():
+        raise ValueError("Text is empty")
+    store = tts_cache.default_cache() if cache else None
+    if store is None:
+        return _stream_speech(text, model, voice, format, chunk_size)
+    key = tts_cache.cache_key(model, voice, format, text)
+    hit = store.get_stream(key, format, chunk_size)
+    if hit is not None:
+        with metrics.span("tts", "stream") as s:
+            s.status = "cache_hit"
+        return hit
+    return store.put_stream(key, format, _stream_speech(text, model, voice, format, chunk_size))
+
+
+def _stream_speech(text: str, model: str, voice: str, format: str, chunk_size: int) -> Iterator[bytes]:
+    # As with LLM streams, the span and the rate-limiter slot last until the
+    # last chunk or the consumer closing the generator early
+    data = {"model": model, "voice": voice, "input": text, "format": format}
+    with metrics.span("tts", "stream") as s, rate_limiter.slot("tts") as slot:
+        r = hedging.post(
+            "tts",
+            TTS_ENDPOINT,
+            headers={"Authorization": f"Bearer {_api_key()}"},
+            json=data,
+            timeout=TTS_TIMEOUT,
+            stream=True,
+        )
+        slot.observe(r)
+        with r:
+            if s.on:
+                s.status = r.status_code
+                s.bytes_out = len(text.encode("utf-8"))
+                s.retries = http_client.retries(r)
+            if r.status_code != 200:
+                raise RuntimeError(f"TTS {r.status_code}: {r.text[:500]}")
+            for chunk in r.iter_content(chunk_size=max(1, chunk_size)):
+                if chunk:
+                    if s.on:
+                        s.bytes_in += len(chunk)
+                    yield chunk
+
+
+async def asynthesize_speech(
+    text: str, model: str = TTS_MODEL, voice: str = "alloy", format: str = "mp3",
+    cache: bool = True,
 ) -> bytes:
-    """Send text to OpenAI TTS and return audio bytes."""
+    """Coroutine version of `synthesize_speech`; shares the same cache and error semantics."""
     if not text or not text.strip():
         raise ValueError("Text is empty")
 
+    store = tts_cache.default_cache() if cache else None
+    key = tts_cache.cache_key(model, voice, format, text)
+    if store is not None:
+        hit = await asyncio.to_thread(store.get, key, format)
+        if hit is not None:
+            return hit
+
+    async with rate_limiter.aslot("tts") as slot:
+        r = await async_client.post(
+            TTS_ENDPOINT,
+            headers={"Authorization": f"Bearer {_api_key()}"},
+            json={"model": model, "voice": voice, "input": text, "format": format},
+            timeout=TTS_TIMEOUT,
+        )
+        slot.observe(r)
+
+    if r.status_code != 200:
+        raise RuntimeError(f"TTS {r.status_code}: {r.text[:500]}")
+
+    if store is not None:
+        await asyncio.to_thread(store.put, key, format, r.content)
+    return r.content
+
+
+def cache_stats() -> Dict:
+    """Hit/miss counters of the TTS cache (empty when caching is disabled)."""
+    store = tts_cache.default_cache()
+    return store.stats() if store is not None else {}
+
+
+def _request_speech(text: str, model: str, voice: str, format: str, span=None) -> bytes:
     data = {"model": model, "voice": voice, "input": text, "format": format}
 
-    r = requests.post(
-        TTS_ENDPOINT,
-        headers={"Authorization": f"Bearer {_api_key()}"},
-        json=data,
-        timeout=TTS_TIMEOUT,
-    )
+    with rate_limiter.slot("tts") as slot:
+        r = hedging.post(
+            "tts",
+            TTS_ENDPOINT,
+            headers={"Authorization": f"Bearer {_api_key()}"},
+            json=data,
+            timeout=TTS_TIMEOUT,
+        )
+        slot.observe(r)
+    if span is not None and span.on:
+        span.status = r.status_code
+        span.bytes_out = len(text.encode("utf-8"))
+        span.bytes_in = len(r.content)
+        span.retries = http_client.retries(r)
 
     if r.status_code != 200:
         raise RuntimeError(f"TTS {r.status_code}: {r.text[:500]}")
@@ -45,12 +176,18 @@ if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python services/tts_service.py 'Your text here'", file=sys.stderr)
         sys.exit(2)
+    out_path = "output.mp3"
     try:
-        audio_bytes = synthesize_speech(sys.argv[1])
-        out_path = "output.mp3"
-        with open(out_path, "wb") as f:
-            f.write(audio_bytes)
+        # Written as the audio arrives; renamed only once it is complete
+        with open(out_path + ".part", "wb") as f:
+            for chunk in stream_speech(sys.argv[1]):
+                f.write(chunk)
+        os.replace(out_path + ".part", out_path)
         print(f"✅ Saved TTS to {out_path}")
     except Exception as e:
+        try:
+            os.remove(out_path + ".part")
+        except OSError:
+            pass
         print(f"[ERROR] {e}", file=sys.stderr)
         sys.exit(1)
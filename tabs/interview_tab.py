@@ -1,32 +1,150 @@
 import streamlit as st
-import tempfile
-from services import llm_service, tts_service, stt_service
-from streamlit_mic_recorder import mic_recorder
-from utilities import interview_utility
+import time, itertools
+from services import llm_service, stt_service, speech_pipeline, tts_prefetch, question_bank, metrics, rate_limiter
+from utilities import interview_utility, history_manager, audio_store
+
+
+_speech_ids = itertools.count()
+
+
+def _queue_audio(segment: bytes, mime: str = "audio/mp3"):
+    """
+    Append a clip to a player queue that lives in the parent page, so segments
+    play back-to-back in order and keep playing across the rerun that follows.
+    The page only gets a media URL; it is registered again on the following
+    run (_keep_speech_urls), so the st.rerun() right after a turn can't drop
+    it before the page has fetched it.
+    """
+    import streamlit.components.v1 as components
+    key = f"ai-speech-{next(_speech_ids)}"
+    src = audio_store.media_url(segment, mime, key)
+    if src is not None:
+        st.session_state.speech_segments.append((segment, mime, key))
+    if src is None:  # no media endpoint (bare script run): inline it
+        import base64
+        src = f"data:{mime};base64,{base64.b64encode(segment).decode('utf-8')}"
+    components.html(f"""
+    <script>
+    const w = window.parent;
+    if (!w.__aiSpeech) {{
+        w.__aiSpeech = {{
+            queue: [], playing: false,
+            next() {{
+                const clip = this.queue.shift();
+                if (!clip) {{ this.playing = false; return; }}
+                this.playing = true;
+                clip.then(url => {{
+                    const a = new w.Audio(url);
+                    const done = () => {{ w.URL.revokeObjectURL(url); this.next(); }};
+                    a.onended = done;
+                    a.onerror = done;
+                    a.play().catch(done);
+                }}, () => this.next());
+            }},
+        }};
+    }}
+    // Queued in order; each entry resolves once its bytes are local
+    w.__aiSpeech.queue.push(
+        w.fetch("{src}").then(r => r.ok ? r.blob() : Promise.reject(r.status))
+                        .then(b => w.URL.createObjectURL(b))
+    );
+    if (!w.__aiSpeech.playing) w.__aiSpeech.next();
+    </script>
+    """, height=0)
+
+
+# Query parameter holding the running interview's id, so a reload can resume it
+_RESUME_PARAM = "interview"
+
+
+def _keep_speech_urls():
+    """
+    Re-registers the segments queued during the previous run under their
+    old keys (same URLs), then forgets them: Streamlit drops media a run no
+    longer references, and the rerun after a turn takes only milliseconds.
+    """
+    carried = st.session_state.speech_segments
+    st.session_state.speech_segments = []
+    for segment, mime, key in carried:
+        audio_store.media_url(segment, mime, key)
+
+
+def _opener_text(name: str, role: str) -> str:
+    return f"Welcome {name}, thank you for interviewing for the {role} position. Let's begin."
+
+
+def _closer_text(name: str, role: str) -> str:
+    return f"Thank you, {name}, for your time. This concludes your interview for the {role} position."
+
+
+def _prefetch_speech(texts):
+    """
+    Start synthesizing utterances whose text is already fixed, and cancel
+    this session's earlier prefetches that no longer match (e.g. the name
+    was edited before starting).
+    """
+    stale = [t for t in st.session_state.prefetched_texts if t not in texts]
+    if stale:
+        tts_prefetch.cancel(stale)
+    for t in texts:
+        tts_prefetch.prefetch(t)
+    st.session_state.prefetched_texts = list(texts)
+
+
+def _turn_breakdown():
+    """Per-stage timings of the last turn (only when METRICS=1)."""
+    events = st.session_state.turn_metrics
+    if not metrics.enabled() or not events:
+        return
+    with st.expander(f"⏱️ Last turn: {st.session_state.turn_ms:.0f} ms", expanded=False):
+        st.dataframe(
+            [{"stage": e["stage"], "op": e["op"], "ms": round(e["ms"], 1), "status": e["status"],
+              "bytes in": e["bytes_in"], "bytes out": e["bytes_out"], "retries": e["retries"]}
+             for e in events],
+            use_container_width=True, hide_index=True,
+        )
 
 
 def render():
+    # Time the whole script run, rerun included (st.rerun() exits through here)
+    with metrics.span("ui", "render"):
+        _render()
+
+
+def _render():
 
     # --- Session State Initialization ---
-    st.set_page_config(page_title="AI Interviewer", layout="wide")
     st.title("💼 AI Interviewer")
     state_defaults = {
         "interview_history": [],
         "interview_role": None,
         "candidate_name": None,
+        "interview_id": None,
         "draft_reply": "",
         "last_audio": None,
         "last_played_ai_idx": -1,
         "interview_ended": False,
+        "history_manager": None,
+        "prefetched_texts": [],
+        "turn_metrics": [],
+        "turn_ms": 0.0,
+        "speech_segments": [],
     }
     for k, v in state_defaults.items():
         if k not in st.session_state:
             st.session_state[k] = v
+    if st.session_state.history_manager is None:
+        st.session_state.history_manager = history_manager.HistoryManager()
+    _keep_speech_urls()
 
     # --- Restart option ---
     if st.session_state.interview_role and st.session_state.candidate_name:
         if st.button("🔄 Restart Interview"):
+            if st.session_state.interview_id:
+                interview_utility.close_journal(st.session_state.interview_id)
+            tts_prefetch.cancel(st.session_state.prefetched_texts)
             st.session_state.clear()
+            st.query_params.pop(_RESUME_PARAM, None)
             st.rerun()
 
     # --- Name and Role selection ---
@@ -34,12 +152,20 @@ def render():
         st.subheader("👤 Enter Your Details to Begin")
         name_input = st.text_input("Your Name")
         role_input = st.text_input("Job Role (e.g., Software Engineer, Data Scientist)")
+        # Opener and closer are fixed once both fields are filled: synthesize them now
+        if name_input.strip() and role_input.strip():
+            _prefetch_speech([_opener_text(name_input.strip(), role_input.strip()),
+                              _closer_text(name_input.strip(), role_input.strip())])
         if st.button("Start Interview"):
             if not name_input.strip() or not role_input.strip():
                 st.warning("Please enter both your name and the job role.")
             else:
                 st.session_state.candidate_name = name_input.strip()
                 st.session_state.interview_role = role_input.strip()
+                st.session_state.interview_id = interview_utility.new_interview(
+                    st.session_state.candidate_name, st.session_state.interview_role)
+                # Only this browser tab can come back to it (reload, server restart)
+                st.query_params[_RESUME_PARAM] = st.session_state.interview_id
                 # Add system instruction for LLM context
                 st.session_state.interview_history.append({
                     "role": "system",
@@ -51,127 +177,162 @@ def render():
                     )
                 })
                 # Use hardcoded opener
-                opener = f"Welcome {name_input}, thank you for interviewing for the {role_input} position. Let's begin."
+                opener = _opener_text(st.session_state.candidate_name, st.session_state.interview_role)
                 try:
-                    audio_bytes = tts_service.synthesize_speech(opener)
+                    audio_bytes = tts_prefetch.take(opener)
                 except Exception as e:
                     st.error(f"⚠️ Error: {e}")
                     return
-                st.session_state.interview_history.append({"role": "assistant", "content": opener, "audio": audio_bytes})
-                interview_utility.save_transcript(st.session_state.candidate_name, st.session_state.interview_history)
-                interview_utility.save_audio(st.session_state.candidate_name, 1, "assistant", audio_bytes, ext="mp3")
+                # A prebuilt first question for this role goes out with the opener
+                # (MP3 concatenates); without one the LLM asks it after the first reply
+                banked = question_bank.draw(st.session_state.interview_role)
+                if banked:
+                    opener = f"{opener} {banked[0]}"
+                    audio_bytes = audio_bytes + banked[1]
+                audio_path = interview_utility.save_audio(st.session_state.interview_id, 1, "assistant", audio_bytes, ext="mp3")
+                st.session_state.interview_history.append({"role": "assistant", "content": opener, "audio_path": audio_path})
+                for entry in st.session_state.interview_history:
+                    interview_utility.append_entry(st.session_state.interview_id, entry)
                 st.rerun()
+        # Pick up this tab's interview interrupted by a reload or restart, rebuilt from its journal
+        resumable = st.query_params.get(_RESUME_PARAM)
+        if interview_utility.is_resumable(resumable):
+            if st.button("Resume Previous Interview"):
+                state = interview_utility.resume_interview(resumable)
+                if not state or not state["role"] or not state["history"]:
+                    st.warning("No resumable interview found.")
+                else:
+                    st.session_state.interview_id = state["id"]
+                    st.session_state.candidate_name = state["candidate"]
+                    st.session_state.interview_role = state["role"]
+                    st.session_state.interview_history = state["history"]
+                    st.session_state.interview_ended = state["ended"]
+                    st.session_state.last_played_ai_idx = len(state["history"]) - 1
+                    st.rerun()
         return
 
     # --- Conversation UI ---
     st.subheader(f"Interview for: {st.session_state.interview_role} (Candidate: {st.session_state.candidate_name})")
+    closer = _closer_text(st.session_state.candidate_name, st.session_state.interview_role)
+    if not st.session_state.interview_ended:
+        _prefetch_speech([closer])  # no-op while already queued; covers resumed interviews
 
     # --- Display chat history with auto-play for assistant audio ---
-    last_idx = len(st.session_state.interview_history) - 1
-    # Render all but the last message
-    for idx, entry in enumerate(st.session_state.interview_history[:-1]):
-        with st.chat_message(entry["role"]):
-            st.write(entry["content"])
-            if entry.get("audio"):
-                fmt = "audio/wav" if entry["role"] == "user" else "audio/mp3"
-                st.audio(entry["audio"], format=fmt)
+    # Entries hold file paths; players are only built for one page of the
+    # history, so memory and payload per rerun don't grow with the interview
+    history = st.session_state.interview_history
+    last_idx = len(history) - 1
+    pages = audio_store.page_count(len(history))
+    page = 0
+    if pages > 1:
+        page = st.select_slider(
+            "Audio page (0 = latest)", options=list(range(pages)), value=0, key="audio_page"
+        )
+    start, end = audio_store.page_bounds(len(history), page)
 
-    # Render the last message (if any), with autoplay only if not already played
-    if last_idx >= 0:
-        entry = st.session_state.interview_history[last_idx]
+    for idx, entry in enumerate(history):
         with st.chat_message(entry["role"]):
             st.write(entry["content"])
-            if entry.get("audio"):
-                if entry["role"] == "assistant" and st.session_state.last_played_ai_idx != last_idx:
-                    import base64
-                    audio_b64 = base64.b64encode(entry["audio"]).decode("utf-8")
-                    audio_html = f'''
-                    <audio id="ai-audio" src="data:audio/mp3;base64,{audio_b64}" autoplay controls style="width: 100%; margin-top: 0.5em;"></audio>
-                    <script>
-                    var audio = document.getElementById('ai-audio');
-                    if (audio) {{
-                        audio.autoplay = true;
-                        audio.play().catch(()=>{{}});
-                    }}
-                    </script>
-                    '''
-                    st.markdown(audio_html, unsafe_allow_html=True)
-                    st.session_state.last_played_ai_idx = last_idx
-                else:
-                    fmt = "audio/wav" if entry["role"] == "user" else "audio/mp3"
-                    st.audio(entry["audio"], format=fmt)
+            path = entry.get("audio_path")
+            if not path:
+                continue
+            # Autoplay the newest reply once, even if an older page is selected
+            # (st.audio sends only a /media URL; the clip is fetched over HTTP)
+            if idx == last_idx and entry["role"] == "assistant" and st.session_state.last_played_ai_idx != last_idx:
+                st.audio(interview_utility.audio_source(path), format=audio_store.mime_type(path), autoplay=True)
+                st.session_state.last_played_ai_idx = last_idx
+            elif start <= idx < end:
+                st.audio(interview_utility.audio_source(path), format=audio_store.mime_type(path))
 
 
+    _turn_breakdown()
     st.divider()
 
     # --- End Interview Button ---
     if not st.session_state.interview_ended:
         if st.button("End Interview Here"):
-            closer = f"Thank you, {st.session_state.candidate_name}, for your time. This concludes your interview for the {st.session_state.interview_role} position."
             try:
-                closer_audio = tts_service.synthesize_speech(closer)
+                closer_audio = tts_prefetch.take(closer)
             except Exception as e:
                 st.error(f"⚠️ TTS Error: {e}")
                 return
-            st.session_state.interview_history.append({"role": "assistant", "content": closer, "audio": closer_audio})
-            ai_entries = [e for e in st.session_state.interview_history if e["role"] == "assistant"]
-            ai_idx = len(ai_entries)
-            interview_utility.save_audio(st.session_state.candidate_name, ai_idx, "assistant", closer_audio, ext="mp3")
+            ai_idx = sum(1 for e in st.session_state.interview_history if e["role"] == "assistant") + 1
+            closer_path = interview_utility.save_audio(st.session_state.interview_id, ai_idx, "assistant", closer_audio, ext="mp3")
+            st.session_state.interview_history.append({"role": "assistant", "content": closer, "audio_path": closer_path})
+            interview_utility.append_entry(st.session_state.interview_id, st.session_state.interview_history[-1])
+            interview_utility.end_journal(st.session_state.interview_id)
+            st.query_params.pop(_RESUME_PARAM, None)
             st.session_state.interview_ended = True
-            interview_utility.save_transcript(st.session_state.candidate_name, st.session_state.interview_history)
+            interview_utility.render_transcript(st.session_state.interview_id)
             st.rerun()
 
 
     # --- Mic Recorder with auto-send after recording ---
     if not st.session_state.interview_ended:
         st.subheader("🎤 Record Your Reply")
+        from streamlit_mic_recorder import mic_recorder  # only needed once the interview is running
         audio = mic_recorder(
             start_prompt="🎙️ Start Recording",
             stop_prompt="⏹️ Stop Recording",
+            format="wav",  # the recorder's default is webm, which STT preprocessing and chunking can't decode
             key=f"mic_{len(st.session_state.interview_history)}",  # unique key per turn
         )
 
-        def save_user_and_ai(user_msg, user_audio):
-            st.session_state.interview_history.append({
-                "role": "user",
-                "content": user_msg.strip(),
-                "audio": user_audio,
-            })
+        def save_user_and_ai(user_msg, user_audio, turn):
+            """`turn` is (metrics mark, start time) taken before transcription, so STT counts in the turn."""
+            interview_id = st.session_state.interview_id
+            history = st.session_state.interview_history
+            turn_mark, turn_start = turn
+            user_entry = {"role": "user", "content": user_msg.strip()}
+            if user_audio:
+                user_idx = sum(1 for e in history if e["role"] == "user") + 1
+                user_entry["audio_path"] = interview_utility.save_audio(interview_id, user_idx, "user", user_audio, ext="wav")
+            history.append(user_entry)
+            interview_utility.append_entry(interview_id, user_entry)
             st.session_state.draft_reply = ""
             st.session_state.last_audio = None
-            messages = [
-                {"role": h["role"], "content": h["content"]}
-                for h in st.session_state.interview_history
-            ]
+            # Budgeted prompt: system + rolling summary + recent turns
+            try:
+                messages = st.session_state.history_manager.build(st.session_state.interview_history)
+            except Exception as e:
+                st.error(f"⚠️ LLM Error: {e}")
+                return
+            # Speak sentence by sentence while the reply is still streaming in
+            pipe = speech_pipeline.SpeechPipeline()
             try:
-                llm_reply = llm_service.chat(messages)
-                audio_bytes = tts_service.synthesize_speech(llm_reply)
+                with st.chat_message("assistant"):
+                    reply_box = st.empty()
+                    for _ in pipe.feed(llm_service.chat_stream(messages)):
+                        reply_box.markdown(pipe.text + "▌")
+                        for segment in pipe.ready():
+                            _queue_audio(segment)
+                    reply_box.markdown(pipe.text)
+                    for segment in pipe.drain():
+                        _queue_audio(segment)
+                llm_reply = pipe.text.strip()
+                audio_bytes = pipe.audio()
             except Exception as e:
+                pipe.close()
                 st.error(f"⚠️ LLM Error: {e}")
                 return
-            st.session_state.interview_history.append({"role": "assistant", "content": llm_reply, "audio": audio_bytes})
-            username = st.session_state.candidate_name
-            interview_utility.save_transcript(username, st.session_state.interview_history)
-            user_entries = [e for e in st.session_state.interview_history if e["role"] == "user"]
-            ai_entries = [e for e in st.session_state.interview_history if e["role"] == "assistant"]
-            user_idx = len(user_entries)
-            ai_idx = len(ai_entries)
-            last_user = user_entries[-1] if user_entries else None
-            last_ai = ai_entries[-1] if ai_entries else None
-            if last_user and last_user.get("audio"):
-                interview_utility.save_audio(username, user_idx, "user", last_user["audio"], ext="wav")
-            if last_ai and last_ai.get("audio"):
-                interview_utility.save_audio(username, ai_idx, "assistant", last_ai["audio"], ext="mp3")
+            ai_idx = sum(1 for e in history if e["role"] == "assistant") + 1
+            ai_path = interview_utility.save_audio(interview_id, ai_idx, "assistant", audio_bytes, ext="mp3")
+            history.append({"role": "assistant", "content": llm_reply, "audio_path": ai_path})
+            interview_utility.append_entry(interview_id, history[-1])
+            # Already spoken through the segment queue; don't autoplay it again after the rerun
+            st.session_state.last_played_ai_idx = len(history) - 1
+            if metrics.enabled():
+                # Only this session's calls (other interviews run on the same process)
+                st.session_state.turn_metrics = metrics.events_since(turn_mark, rate_limiter.current_session())
+                st.session_state.turn_ms = (time.perf_counter() - turn_start) * 1000
             st.rerun()
 
         # If audio is recorded, auto-transcribe and auto-send
         if audio and audio.get("bytes"):
+            turn = metrics.mark(), time.perf_counter()
             st.session_state.last_audio = audio["bytes"]
             try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-                    tmp.write(st.session_state.last_audio)
-                    path = tmp.name
-                text = stt_service.transcribe_audio(path)
+                text = stt_service.transcribe_audio(memoryview(st.session_state.last_audio))
                 st.session_state.draft_reply = text
             except Exception as e:
                 st.error(f"⚠️ STT Error: {e}")
@@ -180,7 +341,7 @@ def render():
             if not user_msg.strip() and not st.session_state.last_audio:
                 st.warning("Please type or record a reply first.")
                 return
-            save_user_and_ai(user_msg, st.session_state.last_audio)
+            save_user_and_ai(user_msg, st.session_state.last_audio, turn)
         else:
             # If no audio, show text input as fallback
             user_msg = st.text_input(
@@ -192,4 +353,4 @@ def render():
                 if not user_msg.strip() and not st.session_state.last_audio:
                     st.warning("Please type or record a reply first.")
                     return
-                save_user_and_ai(user_msg, st.session_state.last_audio)
+                save_user_and_ai(user_msg, st.session_state.last_audio, (metrics.mark(), time.perf_counter()))
@@ -1,5 +1,5 @@
 import streamlit as st
-from services.llm_service import chat_once
+from services.llm_service import chat_once_stream
 
 def render():
 	st.header("🧠 Language Model (LLM)")
@@ -10,15 +10,21 @@ def render():
 
 	with st.form("llm_form"):
 		prompt = st.text_area("Prompt", placeholder="e.g. Say ready", height=140)
+		use_cache = st.checkbox("Reuse the reply for identical prompts", value=False)
 		submitted = st.form_submit_button("Send")
 
 	if submitted:
 		if not prompt.strip():
 			st.warning("Please enter a prompt.")
 		else:
+			live = st.empty()
 			try:
-				response = chat_once(prompt)
-				st.session_state.llm_history.append({"prompt": prompt, "response": response})
+				# Stream tokens as they arrive, then hand over to the history list
+				with live.container():
+					st.markdown(f"**You:** {prompt}")
+					response = st.write_stream(chat_once_stream(prompt, cache=use_cache or None))
+				st.session_state.llm_history.append({"prompt": prompt, "response": response.strip()})
+				live.empty()
 			except Exception as e:
 				st.error(f"Error: {e}")
 
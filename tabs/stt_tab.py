@@ -1,6 +1,7 @@
 import streamlit as st
-import tempfile, time
+import time
 from services import stt_service
+from utilities import audio_store
 from streamlit_mic_recorder import mic_recorder
 
 
@@ -15,6 +16,7 @@ def render():
         start_prompt="🎤 Start Recording",
         stop_prompt="⏹ Stop Recording",
         use_container_width=True,
+        format="wav",  # webm by default; WAV gets preprocessed and chunked before upload
     )
 
     if audio and audio.get("bytes"):
@@ -23,18 +25,13 @@ def render():
 
         if st.button("Transcribe Recording"):
             try:
-                # Save as WAV (correct format)
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-                    tmp.write(audio["bytes"])
-                    path = tmp.name
-
-                # Transcribe
-                text = stt_service.transcribe_audio(path)
+                # Transcribe straight from memory (recorder output is WAV)
+                text = stt_service.transcribe_audio(memoryview(audio["bytes"]))
 
                 # Store in history
                 name = f"mic_{int(time.time())}.wav"
                 st.session_state.stt_history.append(
-                    {"name": name, "text": text, "audio_bytes": audio["bytes"]}
+                    {"name": name, "text": text, "audio_path": audio_store.save(audio["bytes"], ext="wav")}
                 )
 
                 st.success("✅ Transcription complete")
@@ -46,8 +43,18 @@ def render():
     # --- History ---
     if st.session_state.stt_history:
         st.subheader("History")
-        for item in reversed(st.session_state.stt_history):
+        history = st.session_state.stt_history
+        page = 0
+        if audio_store.page_count(len(history)) > 1:
+            page = st.number_input(
+                "Page", min_value=1, max_value=audio_store.page_count(len(history)), value=1, key="stt_page"
+            ) - 1
+        start, end = audio_store.page_bounds(len(history), page)
+        for item in reversed(history[start:end]):
             with st.expander(item["name"], expanded=False):
                 st.write(item["text"])
-                if item.get("audio_bytes"):
-                    st.audio(item["audio_bytes"], format="audio/wav")
+                if item.get("audio_path"):
+                    if audio_store.available(item["audio_path"]):
+                        st.audio(item["audio_path"], format="audio/wav")
+                    else:
+                        st.caption("Audio no longer available.")
@@ -1,5 +1,6 @@
 import streamlit as st
 from services import tts_service
+from utilities import audio_store
 
 
 def render():
@@ -28,7 +29,8 @@ def render():
 
                 # Save history
                 st.session_state.tts_history.append(
-                    {"text": text, "voice": voice, "format": format, "audio_bytes": audio_bytes}
+                    {"text": text, "voice": voice, "format": format,
+                     "audio_path": audio_store.save(audio_bytes, ext=format)}
                 )
                 st.success("✅ Speech generated")
 
@@ -37,6 +39,16 @@ def render():
 
     if st.session_state.tts_history:
         st.subheader("History")
-        for idx, item in enumerate(reversed(st.session_state.tts_history)):
+        history = st.session_state.tts_history
+        page = 0
+        if audio_store.page_count(len(history)) > 1:
+            page = st.number_input(
+                "Page", min_value=1, max_value=audio_store.page_count(len(history)), value=1, key="tts_page"
+            ) - 1
+        start, end = audio_store.page_bounds(len(history), page)
+        for item in reversed(history[start:end]):
             with st.expander(f"{item['voice']} - {item['text'][:30]}...", expanded=False):
-                st.audio(item["audio_bytes"], format=f"audio/{item['format']}")
+                if audio_store.available(item["audio_path"]):
+                    st.audio(item["audio_path"], format=f"audio/{item['format']}")
+                else:
+                    st.caption("Audio no longer available.")
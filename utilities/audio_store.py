@@ -0,0 +1,140 @@
+import os, hashlib, threading
+from typing import Optional, Tuple, Union
+
+# Session histories keep paths into this store (or into an interview directory)
+# instead of raw bytes, so per-session memory does not grow with every clip.
+AUDIO_STORE_DIR = os.getenv(
+    "AUDIO_STORE_DIR",
+    os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")), ".cache", "audio"),
+)
+AUDIO_PAGE_SIZE = int(os.getenv("AUDIO_PAGE_SIZE", "6"))
+# Disk budget; least recently saved/viewed clips are evicted beyond it (0: no limit)
+AUDIO_STORE_BYTES = int(os.getenv("AUDIO_STORE_BYTES", str(256 * 1024 * 1024)))
+
+_MIME = {"mp3": "audio/mp3", "wav": "audio/wav", "ogg": "audio/ogg", "webm": "audio/webm", "flac": "audio/flac"}
+
+
+def save(audio_bytes: bytes, ext: str = "mp3") -> str:
+    """
+    Stores a clip under its content hash and returns the file path.
+    Saving the same clip twice reuses the existing file. Once the store
+    exceeds AUDIO_STORE_BYTES the least recently used clips are deleted.
+    """
+    global _disk_size
+    os.makedirs(AUDIO_STORE_DIR, exist_ok=True)
+    name = f"{hashlib.sha256(audio_bytes).hexdigest()[:32]}.{ext}"
+    path = os.path.join(AUDIO_STORE_DIR, name)
+    if available(path):
+        return path
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(audio_bytes)
+    os.replace(tmp, path)
+    if AUDIO_STORE_BYTES > 0:
+        with _lock:
+            _disk_size = _scan_disk() if _disk_size is None else _disk_size + len(audio_bytes)
+            if _disk_size > AUDIO_STORE_BYTES:
+                _evict()
+    return path
+
+
+def available(path: str) -> bool:
+    """
+    Whether a stored clip still exists (it may have been evicted); marks it
+    as recently used, so clips on screen are evicted last.
+    """
+    try:
+        os.utime(path, None)
+        return True
+    except OSError:
+        return False
+
+
+def load(path: str) -> bytes:
+    """Reads a stored clip back (only needed where raw bytes are unavoidable)."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def mime_type(path: str) -> str:
+    ext = os.path.splitext(path)[1].lstrip(".").lower()
+    return _MIME.get(ext, "audio/mpeg")
+
+
+def media_url(source: Union[str, bytes], mime: str, key: str) -> Optional[str]:
+    """
+    Registers a clip (path or bytes) with Streamlit's media endpoint and
+    returns its URL, so the page carries a link instead of the audio. The
+    endpoint serves range requests under content-hash names. `key` must be
+    unique per clip on the page; the URL lives until the session's next
+    rerun that no longer registers it. None outside a Streamlit server.
+    """
+    try:
+        import streamlit as st
+        from streamlit import runtime
+        if not runtime.exists():
+            return None
+        url = runtime.get_instance().media_file_mgr.add(source, mime, key)
+        base = (st.get_option("server.baseUrlPath") or "").strip("/")
+        return f"/{base}{url}" if base and url.startswith("/") else url
+    except Exception:
+        return None
+
+
+_lock = threading.Lock()
+_disk_size: Optional[int] = None  # computed lazily on the first write
+
+
+def _listdir():
+    try:
+        return [n for n in os.listdir(AUDIO_STORE_DIR) if not n.endswith(".tmp")]
+    except OSError:
+        return []
+
+
+def _scan_disk() -> int:
+    total = 0
+    for name in _listdir():
+        try:
+            total += os.path.getsize(os.path.join(AUDIO_STORE_DIR, name))
+        except OSError:
+            pass
+    return total
+
+
+def _evict() -> None:
+    """Deletes least recently used clips down to 90% of the budget (call with _lock held)."""
+    global _disk_size
+    entries = []
+    for name in _listdir():
+        path = os.path.join(AUDIO_STORE_DIR, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    entries.sort()
+    total = sum(e[1] for e in entries)
+    target = int(AUDIO_STORE_BYTES * 0.9)
+    for _, size, path in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+    _disk_size = total
+
+
+def page_bounds(total: int, page: int, page_size: int = AUDIO_PAGE_SIZE) -> Tuple[int, int]:
+    """
+    [start, end) of page `page` over `total` items, where page 0 is the most
+    recent `page_size` items and higher pages go back in time.
+    """
+    end = max(0, total - page * page_size)
+    return max(0, end - page_size), end
+
+
+def page_count(total: int, page_size: int = AUDIO_PAGE_SIZE) -> int:
+    return max(1, (total + page_size - 1) // page_size)
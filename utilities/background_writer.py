@@ -0,0 +1,147 @@
+import os, time, contextvars, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# -------- Configuration --------
+WRITER_THREADS = int(os.getenv("WRITER_THREADS", "2"))
+WRITER_QUEUE_SIZE = int(os.getenv("WRITER_QUEUE_SIZE", "256"))  # pending ops before submit() blocks
+# --------------------------------
+
+# (fn, item, batch, context): batch ops take a list of items and are coalesced;
+# each op runs in a copy of its submitter's context (rate-limiter session tags)
+_Op = Tuple[Callable[..., Any], Any, bool, contextvars.Context]
+
+
+class BackgroundWriter:
+    """
+    Runs disk writes off the request thread on a small thread pool.
+
+    Ops are grouped by key (one interview = one key): ops for the same key run
+    in submission order on one worker at a time, while different keys are
+    written in parallel. Consecutive batch ops with the same function are
+    merged into one call taking the list of their items, so several journal
+    records queued during a turn land in a single write.
+
+        writer.submit("alice", write_audio, (path, data))
+        writer.submit("alice", append_records, record, batch=True)
+        writer.flush("alice")   # block until alice's ops are on disk
+
+    The queue is bounded: submit() blocks while WRITER_QUEUE_SIZE ops are
+    pending, so a stalled disk slows the UI down instead of growing memory.
+    """
+
+    def __init__(self, max_workers: int = WRITER_THREADS, max_pending: int = WRITER_QUEUE_SIZE):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                        thread_name_prefix="persist-writer")
+        self._max_pending = max(1, max_pending)
+        self._queues: Dict[str, Deque[_Op]] = {}
+        self._active = set()  # keys with a drain job scheduled or running
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = {"submitted": 0, "written": 0, "batches": 0, "merged": 0, "errors": 0,
+                       "total_latency": 0.0, "max_latency": 0.0}
+        self._last_error: Optional[str] = None
+
+    # ---- public API ----
+    def submit(self, key: str, fn: Callable[..., Any], item: Any, batch: bool = False) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BackgroundWriter is closed")
+            while self._pending >= self._max_pending:
+                self._cond.wait()
+            self._queues.setdefault(key, deque()).append((fn, item, batch, contextvars.copy_context()))
+            self._pending += 1
+            self._stats["submitted"] += 1
+            if key in self._active:
+                return
+            self._active.add(key)
+        try:
+            self._pool.submit(self._drain, key)
+        except RuntimeError:
+            # Pool already shut down (interpreter exit): write on this thread
+            self._drain(key)
+
+    def flush(self, key: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until every op for `key` (or for all keys) has been written.
+        Returns False if `timeout` expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while (key in self._active) if key is not None else self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def depth(self, key: Optional[str] = None) -> int:
+        with self._cond:
+            if key is None:
+                return self._pending
+            return len(self._queues.get(key, ()))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Queue depth plus counters: ops submitted/written, write batches run,
+        ops merged into another op's write, errors, and per-batch latency.
+        """
+        with self._cond:
+            out: Dict[str, Any] = dict(self._stats)
+            out["queue_depth"] = self._pending
+            out["active_keys"] = len(self._active)
+            out["avg_latency"] = out["total_latency"] / out["batches"] if out["batches"] else 0.0
+            out["last_error"] = self._last_error
+        del out["total_latency"]
+        return out
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flushes everything, then stops accepting ops and shuts the pool down."""
+        self.flush(timeout=timeout)
+        with self._cond:
+            self._closed = True
+        self._pool.shutdown(wait=True)
+
+    # ---- internals ----
+    def _drain(self, key: str) -> None:
+        while True:
+            with self._cond:
+                q = self._queues.get(key)
+                if not q:
+                    self._queues.pop(key, None)
+                    self._active.discard(key)
+                    self._cond.notify_all()
+                    return
+                ops = list(q)
+                q.clear()
+            merged = self._merge(ops)
+            for fn, items, batch, ctx in merged:
+                start = time.monotonic()
+                try:
+                    ctx.run(fn, items)
+                except Exception as e:
+                    with self._cond:
+                        self._stats["errors"] += 1
+                        self._last_error = f"{getattr(fn, '__name__', fn)}: {e}"
+                elapsed = time.monotonic() - start
+                with self._cond:
+                    self._stats["batches"] += 1
+                    self._stats["total_latency"] += elapsed
+                    self._stats["max_latency"] = max(self._stats["max_latency"], elapsed)
+            with self._cond:
+                self._pending -= len(ops)
+                self._stats["written"] += len(ops)
+                self._stats["merged"] += len(ops) - len(merged)
+                self._cond.notify_all()
+
+    @staticmethod
+    def _merge(ops: List[_Op]) -> List[_Op]:
+        merged: List[_Op] = []
+        for fn, item, batch, ctx in ops:
+            if batch and merged and merged[-1][2] and merged[-1][0] is fn:
+                merged[-1][1].append(item)
+            else:
+                merged.append((fn, [item] if batch else item, batch, ctx))
+        return merged
@@ -0,0 +1,86 @@
+import os
+from typing import Callable, Dict, List, Optional
+
+# -------- Configuration --------
+CONTEXT_BUDGET = int(os.getenv("LLM_CONTEXT_BUDGET", "3000"))   # estimated prompt tokens
+KEEP_RECENT = int(os.getenv("LLM_KEEP_RECENT", "6"))            # messages always sent verbatim
+SUMMARY_MAX_TOKENS = int(os.getenv("LLM_SUMMARY_MAX_TOKENS", "300"))
+LOW_WATER = 0.6                                                 # fold down to this share of the budget
+# --------------------------------
+
+SUMMARY_PREFIX = "Summary of the interview so far:\n"
+
+SUMMARIZER_PROMPT = (
+    "You keep running notes of a job interview. Merge the new exchanges into the "
+    "existing notes. Keep the questions already asked, the candidate's key answers, "
+    "claims and skills, and anything the interviewer should follow up on. "
+    "Be concise and factual; reply with the updated notes only."
+)
+
+
+def estimate_tokens(message: Dict[str, str]) -> int:
+    """Rough token count (~4 characters per token plus per-message overhead)."""
+    return (len(message.get("content") or "") + 3) // 4 + 4
+
+
+def _llm_summarize(previous: str, turns: List[Dict[str, str]]) -> str:
+    from services import llm_service
+    lines = "\n".join(f"{m['role']}: {m['content']}" for m in turns)
+    return llm_service.chat(
+        [
+            {"role": "system", "content": SUMMARIZER_PROMPT},
+            {"role": "user", "content": f"Existing notes:\n{previous or '(none)'}\n\nNew exchanges:\n{lines}"},
+        ],
+        temperature=0.2,
+        max_tokens=SUMMARY_MAX_TOKENS,
+    )
+
+
+class HistoryManager:
+    """
+    Builds the message list sent to the LLM each turn within a token budget.
+    System messages and the most recent turns go verbatim; once the budget is
+    exceeded, older turns are folded into one rolling summary. Folding is
+    incremental: each call only summarizes turns not folded before, on top of
+    the previous summary.
+    Keep one instance per interview (it is plain data, safe in st.session_state).
+    """
+
+    def __init__(self, budget_tokens: int = CONTEXT_BUDGET, keep_recent: int = KEEP_RECENT,
+                 summarize: Optional[Callable[[str, List[Dict[str, str]]], str]] = None):
+        self.budget_tokens = budget_tokens
+        self.keep_recent = max(1, keep_recent)
+        self._summarize = summarize
+        self.summary = ""
+        self.folded = 0  # conversation messages already folded into the summary
+
+    def _summary_message(self) -> List[Dict[str, str]]:
+        if not self.summary:
+            return []
+        return [{"role": "system", "content": SUMMARY_PREFIX + self.summary}]
+
+    def build(self, history: List[Dict]) -> List[Dict[str, str]]:
+        """Return the bounded message list for `history` (entries may carry extra keys)."""
+        system = [{"role": h["role"], "content": h["content"]} for h in history if h["role"] == "system"]
+        convo = [{"role": h["role"], "content": h["content"]} for h in history if h["role"] != "system"]
+        self.folded = min(self.folded, len(convo))
+        recent = convo[self.folded:]
+
+        total = self.prompt_tokens(system + self._summary_message() + recent)
+        if total > self.budget_tokens and len(recent) > self.keep_recent:
+            # Fold down to the low-water mark in one call, so the next few turns
+            # fit without another summarization round-trip
+            target = int(self.budget_tokens * LOW_WATER)
+            n = 0
+            while len(recent) - n > self.keep_recent and total > target:
+                total -= estimate_tokens(recent[n])
+                n += 1
+            summarize = self._summarize or _llm_summarize
+            self.summary = summarize(self.summary, recent[:n]).strip()
+            self.folded += n
+            recent = recent[n:]
+
+        return system + self._summary_message() + recent
+
+    def prompt_tokens(self, messages: List[Dict[str, str]]) -> int:
+        return sum(estimate_tokens(m) for m in messages)
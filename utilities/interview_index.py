@@ -0,0 +1,307 @@
+import os, sys, json, time, sqlite3, argparse, threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# SQLite index over the interview directories, so the app can list and
+# search past interviews without walking the filesystem.
+#
+#   interviews   one row per interview: id, candidate, role, directory,
+#                start / end / last-update times, turn and audio counts
+#   turns_fts    FTS5 table with the text of every user / assistant turn
+#
+# The journals stay the source of truth: rows are fed from the same records
+# interview_utility appends to journal.jsonl, and `rebuild` recreates the
+# index (legacy <name>-interview directories included) from the journals.
+#
+#   python utilities/interview_index.py rebuild
+#   python utilities/interview_index.py list --candidate Ada
+#   python utilities/interview_index.py search "binary search tree"
+
+# -------- Configuration --------
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+INTERVIEWS_DIR = os.path.join(_ROOT, "interviews")
+INTERVIEW_INDEX_PATH = os.getenv("INTERVIEW_INDEX_PATH", os.path.join(INTERVIEWS_DIR, "index.sqlite3"))
+# --------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS interviews (
+    id TEXT PRIMARY KEY,
+    candidate TEXT NOT NULL,
+    role TEXT,
+    dir TEXT NOT NULL,
+    started_at REAL,
+    ended_at REAL,
+    updated_at REAL,
+    turns INTEGER NOT NULL DEFAULT 0,
+    user_turns INTEGER NOT NULL DEFAULT 0,
+    audio_files INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS interviews_started ON interviews (started_at DESC);
+CREATE INDEX IF NOT EXISTS interviews_candidate ON interviews (candidate COLLATE NOCASE, started_at DESC);
+"""
+
+_COLUMNS = "i.id, i.candidate, i.role, i.dir, i.started_at, i.ended_at, i.updated_at, " \
+           "i.turns, i.user_turns, i.audio_files"
+
+
+def _row(r: Tuple) -> Dict:
+    out = dict(zip(("id", "candidate", "role", "dir", "started_at", "ended_at", "updated_at",
+                    "turns", "user_turns", "audio_files"), r))
+    out["path"] = os.path.join(INTERVIEWS_DIR, out["dir"])
+    end = out["ended_at"] or out["updated_at"]
+    out["duration"] = round(end - out["started_at"], 1) if end and out["started_at"] else None
+    return out
+
+
+def _match_query(query: str) -> str:
+    """Quote each word so user input can't trip FTS5 query syntax."""
+    return " ".join('"' + w.replace('"', '""') + '"' for w in query.split())
+
+
+class InterviewIndex:
+    """
+    Thread-safe handle on the index file. Writes come from the background
+    writer threads, reads from Streamlit sessions; one connection in WAL
+    mode serves both. SQLite errors on write are swallowed (the journal
+    still has the data and `rebuild` catches up).
+    """
+
+    def __init__(self, path: str = INTERVIEW_INDEX_PATH):
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._fts = True
+        self._lock = threading.Lock()
+
+    # ---- writes ----
+    def record(self, interview_id: str, dir_name: str, records: Iterable[Dict]) -> None:
+        """Applies journal records (start / turns / end) for one interview."""
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return
+            try:
+                with db:
+                    for rec in records:
+                        self._apply(db, interview_id, dir_name, rec)
+            except sqlite3.Error:
+                pass
+
+    def rebuild(self, root: Optional[str] = None) -> int:
+        """Re-indexes every interview directory under `root` from its journal."""
+        root = root or INTERVIEWS_DIR
+        count = 0
+        for name in sorted(os.listdir(root)) if os.path.isdir(root) else ():
+            journal = os.path.join(root, name, "journal.jsonl")
+            if not os.path.isfile(journal):
+                continue
+            records = []
+            with open(journal, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        break  # torn record: everything before it is intact
+            # Directories from before the index carry no id: <name>-interview
+            start = next((r for r in records if r.get("event") == "start"), {})
+            interview_id = start.get("id") or (name[:-len("-interview")] if name.endswith("-interview") else name)
+            self.delete(interview_id)
+            self.record(interview_id, name, records)
+            count += 1
+        return count
+
+    def delete(self, interview_id: str) -> None:
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return
+            with db:
+                db.execute("DELETE FROM interviews WHERE id = ?", (interview_id,))
+                db.execute(f"DELETE FROM {self._text_table} WHERE interview_id = ?", (interview_id,))
+
+    # ---- reads ----
+    def get(self, interview_id: str) -> Optional[Dict]:
+        rows = self._query(f"SELECT {_COLUMNS} FROM interviews i WHERE i.id = ?", (interview_id,))
+        return _row(rows[0]) if rows else None
+
+    def list(self, candidate: Optional[str] = None, role: Optional[str] = None,
+             ended: Optional[bool] = None, limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Newest first; `candidate` and `role` match case-insensitively."""
+        where, args = [], []
+        if candidate:
+            where.append("i.candidate = ? COLLATE NOCASE")
+            args.append(candidate)
+        if role:
+            where.append("i.role = ? COLLATE NOCASE")
+            args.append(role)
+        if ended is not None:
+            where.append("i.ended_at IS NOT NULL" if ended else "i.ended_at IS NULL")
+        sql = f"SELECT {_COLUMNS} FROM interviews i"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY i.started_at DESC LIMIT ? OFFSET ?"
+        return [_row(r) for r in self._query(sql, (*args, limit, offset))]
+
+    def latest(self, candidate: str, ended: Optional[bool] = None) -> Optional[Dict]:
+        rows = self.list(candidate=candidate, ended=ended, limit=1)
+        return rows[0] if rows else None
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Interviews whose transcript matches every word of `query`, best match
+        first. Each result carries a `snippet` of the matching turn.
+        """
+        if not query.strip():
+            return []
+        with self._lock:
+            fts = self._conn() is not None and self._fts
+        if fts:
+            sql = (f"SELECT {_COLUMNS}, snippet(turns_fts, 0, '[', ']', '…', 12) "
+                   "FROM turns_fts JOIN interviews i ON i.id = turns_fts.interview_id "
+                   "WHERE turns_fts MATCH ? ORDER BY rank LIMIT ?")
+            args: Tuple = (_match_query(query), limit * 4)
+        else:
+            words = query.split()
+            sql = (f"SELECT {_COLUMNS}, substr(t.content, 1, 120) "
+                   "FROM turns_text t JOIN interviews i ON i.id = t.interview_id WHERE "
+                   + " AND ".join("t.content LIKE ?" for _ in words)
+                   + " ORDER BY i.started_at DESC LIMIT ?")
+            args = (*(f"%{w}%" for w in words), limit * 4)
+        out: List[Dict] = []
+        seen = set()
+        # Several turns of one interview can match: keep its best one
+        for r in self._query(sql, args):
+            if r[0] in seen:
+                continue
+            seen.add(r[0])
+            row = _row(r[:-1])
+            row["snippet"] = r[-1]
+            out.append(row)
+            if len(out) >= limit:
+                break
+        return out
+
+    def count(self) -> int:
+        rows = self._query("SELECT COUNT(*) FROM interviews", ())
+        return rows[0][0] if rows else 0
+
+    # ---- internals ----
+    @property
+    def _text_table(self) -> str:
+        return "turns_fts" if self._fts else "turns_text"
+
+    def _query(self, sql: str, args: Tuple) -> List[Tuple]:
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return []
+            return db.execute(sql, args).fetchall()
+
+    def _apply(self, db: sqlite3.Connection, interview_id: str, dir_name: str, rec: Dict) -> None:
+        ts = rec.get("ts")
+        event = rec.get("event")
+        if event == "start":
+            db.execute(
+                "INSERT OR REPLACE INTO interviews (id, candidate, role, dir, started_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (interview_id, rec.get("candidate") or interview_id, rec.get("role"), dir_name, ts, ts))
+        elif event == "end":
+            db.execute("UPDATE interviews SET ended_at = ?, updated_at = ? WHERE id = ?",
+                       (ts, ts, interview_id))
+        elif rec.get("role") in ("user", "assistant"):
+            db.execute(
+                "UPDATE interviews SET turns = turns + 1, user_turns = user_turns + ?, "
+                "audio_files = audio_files + ?, updated_at = ? WHERE id = ?",
+                (int(rec["role"] == "user"), int(bool(rec.get("audio"))), ts, interview_id))
+            db.execute(f"INSERT INTO {self._text_table} (content, interview_id, role) VALUES (?, ?, ?)",
+                       (rec.get("content") or "", interview_id, rec["role"]))
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        """Open the index lazily; None if the file can't be used."""
+        if self._db is None and self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.executescript(_SCHEMA)
+                try:
+                    db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5"
+                               "(content, interview_id UNINDEXED, role UNINDEXED)")
+                except sqlite3.OperationalError:
+                    # SQLite built without FTS5: plain table, searched with LIKE
+                    self._fts = False
+                    db.execute("CREATE TABLE IF NOT EXISTS turns_text (content TEXT, interview_id TEXT, role TEXT)")
+                    db.execute("CREATE INDEX IF NOT EXISTS turns_text_interview ON turns_text (interview_id)")
+                db.commit()
+                self._db = db
+            except (OSError, sqlite3.Error):
+                self.path = ""
+        return self._db
+
+
+_default: Optional[InterviewIndex] = None
+_default_lock = threading.Lock()
+
+
+def default_index() -> InterviewIndex:
+    """
+    Process-wide index shared by all sessions. An empty index is filled from
+    the existing interview directories the first time it is opened.
+    """
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                index = InterviewIndex()
+                if index.count() == 0:
+                    index.rebuild()
+                _default = index
+    return _default
+
+
+def list_interviews(**kwargs) -> List[Dict]:
+    return default_index().list(**kwargs)
+
+
+def search_interviews(query: str, limit: int = 20) -> List[Dict]:
+    return default_index().search(query, limit)
+
+
+def get_interview(interview_id: str) -> Optional[Dict]:
+    return default_index().get(interview_id)
+
+
+def _print_rows(rows: List[Dict]) -> None:
+    for r in rows:
+        started = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["started_at"])) if r["started_at"] else "?"
+        status = "ended" if r["ended_at"] else "open"
+        line = f"{r['id']}  {started}  {r['candidate']} ({r['role']})  {r['turns']} turns  {status}"
+        if "snippet" in r:
+            line += f"\n    {r['snippet']}"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="List, search or rebuild the interview index.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("rebuild", help="re-index every interview directory from its journal")
+    ls = sub.add_parser("list")
+    ls.add_argument("--candidate")
+    ls.add_argument("--role")
+    ls.add_argument("--limit", type=int, default=50)
+    fs = sub.add_parser("search")
+    fs.add_argument("query")
+    fs.add_argument("--limit", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    index = default_index()
+    if args.cmd == "rebuild":
+        print(f"Indexed {index.rebuild()} interviews into {index.path}")
+    elif args.cmd == "list":
+        _print_rows(index.list(candidate=args.candidate, role=args.role, limit=args.limit))
+    else:
+        _print_rows(index.search(args.query, args.limit))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
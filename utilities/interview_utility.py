@@ -1,22 +1,89 @@
-import os
-from typing import List, Dict
+import os, re, sys, json, time, atexit, secrets, threading
+from typing import List, Dict, Optional, Tuple, Union
 
-def get_interview_dir(username: str) -> str:
+try:
+    from utilities import background_writer, interview_index
+except ImportError:  # executed directly: python utilities/interview_utility.py
+    import background_writer, interview_index  # type: ignore
+try:
+    from services import metrics
+except ImportError:  # executed directly: the repo root is not on sys.path
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    from services import metrics
+
+# -------- Journal configuration --------
+JOURNAL_FILENAME = "journal.jsonl"
+JOURNAL_FSYNC_EVERY = int(os.getenv("JOURNAL_FSYNC_EVERY", "8"))          # records per fsync
+JOURNAL_FSYNC_INTERVAL = float(os.getenv("JOURNAL_FSYNC_INTERVAL", "1.0"))  # max seconds between fsyncs
+SHUTDOWN_FLUSH_TIMEOUT = float(os.getenv("WRITER_SHUTDOWN_TIMEOUT", "10"))  # seconds to drain writes at exit
+# ---------------------------------------
+
+# Audio and journal writes run on this writer, keyed by interview id, so the
+# interview turn never waits on disk. flush_writes() blocks until they landed.
+_writer = background_writer.BackgroundWriter()
+
+# Audio queued but not written yet, so the next rerun can still play it
+_pending_audio: Dict[str, bytes] = {}
+_pending_lock = threading.Lock()
+
+# Interview directories already created by this process
+_made_dirs = set()
+
+# interview id -> (directory name under interviews/, candidate name)
+_interviews: Dict[str, Tuple[str, str]] = {}
+_interviews_lock = threading.Lock()
+
+def new_interview(candidate: str, role: str) -> str:
+    """
+    Registers a new interview and starts its journal. Returns its id; every
+    other function here takes that id. Each interview gets its own
+    directory, interviews/<name>-<id>, so candidates with the same name
+    never share one.
+    """
+    interview_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+    with _interviews_lock:
+        _interviews[interview_id] = (f"{_slug(candidate)}-{interview_id}", candidate)
+    _submit_record(interview_id, {"ts": time.time(), "event": "start", "id": interview_id,
+                                  "candidate": candidate, "role": role})
+    return interview_id
+
+def _slug(name: str) -> str:
+    """File-name-safe form of a candidate name (no separators, no leading dots)."""
+    return re.sub(r"[^\w.-]+", "_", name).strip("._") or "candidate"
+
+def _lookup(interview_id: str) -> Tuple[str, str]:
+    """(directory name, candidate) of an interview, via the index after a restart."""
+    with _interviews_lock:
+        known = _interviews.get(interview_id)
+    if known is None:
+        row = interview_index.get_interview(interview_id)
+        # Interviews from before the index live in <name>-interview
+        known = (row["dir"], row["candidate"]) if row else (f"{interview_id}-interview", interview_id)
+        with _interviews_lock:
+            _interviews[interview_id] = known
+    return known
+
+def _interview_dir_path(interview_id: str) -> str:
+    return os.path.join(interview_index.INTERVIEWS_DIR, _lookup(interview_id)[0])
+
+def get_interview_dir(interview_id: str) -> str:
     """
-    Returns the path to the user's interview directory, creating it if necessary.
+    Returns the path to the interview's directory, creating it if necessary.
     """
-    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    interviews_dir = os.path.join(root, "interviews")
-    user_dir = os.path.join(interviews_dir, f"{username}-interview")
-    os.makedirs(user_dir, exist_ok=True)
+    user_dir = _interview_dir_path(interview_id)
+    if user_dir not in _made_dirs:
+        os.makedirs(user_dir, exist_ok=True)
+        _made_dirs.add(user_dir)
     return user_dir
 
-def save_transcript(username: str, history: List[Dict], transcript_filename: str = "transcript.txt") -> str:
+def save_transcript(interview_id: str, history: List[Dict], transcript_filename: str = "transcript.txt") -> str:
     """
-    Saves the transcript in the specified format under the user's interview directory.
+    Saves the transcript in the specified format under the interview directory.
     history: list of dicts with keys 'role' (either 'assistant' or 'user') and 'content'.
+    The file is replaced atomically, so a crash never leaves a half-written transcript.
     """
-    user_dir = get_interview_dir(username)
+    user_dir = get_interview_dir(interview_id)
+    username = _lookup(interview_id)[1]
     transcript_path = os.path.join(user_dir, transcript_filename)
     lines = []
     for entry in history:
@@ -24,22 +91,269 @@ def save_transcript(username: str, history: List[Dict], transcript_filename: str
             lines.append(f"AI Interviewer: {entry['content']}")
         elif entry["role"] == "user":
             lines.append(f"{username}: {entry['content']}")
-    with open(transcript_path, "w", encoding="utf-8") as f:
+    tmp_path = f"{transcript_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         f.write("\n\n".join(lines))
+    os.replace(tmp_path, transcript_path)
     return transcript_path
 
-def save_audio(username: str, entry_idx: int, role: str, audio_bytes: bytes, ext: str = "mp3") -> str:
+def save_audio(interview_id: str, entry_idx: int, role: str, audio_bytes: bytes, ext: str = "mp3") -> str:
     """
-    Saves an audio file for either the AI or the user in the user's interview directory.
+    Saves an audio file for either the AI or the user in the interview directory.
     role: 'assistant' for AI, 'user' for the interviewee.
     ext: file extension, e.g., 'mp3' or 'wav'.
+    The write happens in the background; the path is returned right away and
+    read_audio / audio_source serve the bytes until the file exists.
     """
-    user_dir = get_interview_dir(username)
+    user_dir = get_interview_dir(interview_id)
     if role == "assistant":
         fname = f"ai-response-{entry_idx}.{ext}"
     else:
-        fname = f"{username}-response-{entry_idx}.{ext}"
+        fname = f"{_slug(_lookup(interview_id)[1])}-response-{entry_idx}.{ext}"
     audio_path = os.path.join(user_dir, fname)
-    with open(audio_path, "wb") as f:
-        f.write(audio_bytes)
+    data = bytes(audio_bytes)
+    with _pending_lock:
+        _pending_audio[audio_path] = data
+    _writer.submit(interview_id, _write_audio, (audio_path, data))
     return audio_path
+
+def _write_audio(item: Tuple[str, bytes]) -> None:
+    path, data = item
+    tmp = f"{path}.tmp"
+    try:
+        with metrics.span("disk", "audio") as s:
+            s.bytes_out = len(data)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise  # counted and reported by the writer's stats
+    finally:
+        # Written or failed, the bytes aren't kept for the life of the process
+        with _pending_lock:
+            if _pending_audio.get(path) is data:
+                del _pending_audio[path]
+
+def read_audio(path: str) -> bytes:
+    """Bytes of an interview clip, whether or not its write has finished."""
+    with _pending_lock:
+        data = _pending_audio.get(path)
+    if data is not None:
+        return data
+    with open(path, "rb") as f:
+        return f.read()
+
+def audio_source(path: str) -> Union[str, bytes]:
+    """What to hand to st.audio: the pending bytes while queued, else the path."""
+    with _pending_lock:
+        return _pending_audio.get(path, path)
+
+def flush_writes(interview_id: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+    """Blocks until queued writes for `interview_id` (or everyone) are on disk."""
+    return _writer.flush(interview_id, timeout)
+
+def writer_stats() -> Dict:
+    """Background writer queue depth, write latency and error counters."""
+    return _writer.stats()
+
+# ---------------------------------------------------------------------------
+# Append-only interview journal
+#
+# One JSON object per line in <interview dir>/journal.jsonl:
+#   {"ts": ..., "event": "start", "id": ..., "candidate": ..., "role": ...}
+#   {"ts": ..., "role": "user"|"assistant"|"system", "content": ..., "audio": "<file>"|null}
+#   {"ts": ..., "event": "end"}
+# Each turn appends one short line instead of rewriting the whole transcript;
+# fsyncs are batched (JOURNAL_FSYNC_EVERY records or JOURNAL_FSYNC_INTERVAL
+# seconds). A line torn by a crash is cut off on the next load.
+# transcript.txt is rendered from the journal on demand (render_transcript).
+# The same records feed the SQLite index (utilities/interview_index.py) used
+# to list and search interviews.
+# ---------------------------------------------------------------------------
+
+class _Journal:
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.lock = threading.Lock()
+
+    def append(self, *records: Dict) -> None:
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        with self.lock:
+            self.file.write(data)
+            self.file.flush()  # hand the lines to the OS right away
+            self.unsynced += len(records)
+            if (self.unsynced >= JOURNAL_FSYNC_EVERY
+                    or time.monotonic() - self.last_sync >= JOURNAL_FSYNC_INTERVAL):
+                self._sync()
+
+    def _sync(self) -> None:
+        if self.unsynced:
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def sync(self) -> None:
+        with self.lock:
+            self._sync()
+
+    def close(self) -> None:
+        with self.lock:
+            self._sync()
+            self.file.close()
+
+_journals: Dict[str, _Journal] = {}
+_journals_lock = threading.Lock()
+
+def journal_path(interview_id: str) -> str:
+    return os.path.join(get_interview_dir(interview_id), JOURNAL_FILENAME)
+
+def _journal(interview_id: str) -> _Journal:
+    with _journals_lock:
+        j = _journals.get(interview_id)
+        if j is None:
+            path = journal_path(interview_id)
+            _recover(path)
+            j = _journals[interview_id] = _Journal(path)
+        return j
+
+def _recover(path: str) -> None:
+    """Truncate a torn trailing record left by a crash mid-write."""
+    try:
+        with open(path, "rb+") as f:
+            data = f.read()
+            good = len(data)
+            if data and not data.endswith(b"\n"):
+                good = data.rfind(b"\n") + 1
+            f.truncate(good)
+    except FileNotFoundError:
+        pass
+
+def append_entry(interview_id: str, entry: Dict) -> None:
+    """
+    Queues one history entry (role, content and optional audio_path) for the journal.
+    """
+    audio = entry.get("audio_path")
+    _submit_record(interview_id, {
+        "ts": time.time(),
+        "role": entry["role"],
+        "content": entry["content"],
+        "audio": os.path.basename(audio) if audio else None,
+    })
+
+def _submit_record(interview_id: str, record: Dict) -> None:
+    # batch=True: records queued back to back go out in one write
+    _writer.submit(interview_id, _write_records, (interview_id, record), batch=True)
+
+def _write_records(items: List[Tuple[str, Dict]]) -> None:
+    interview_id = items[0][0]
+    records = [record for _, record in items]
+    with metrics.span("disk", "journal"):
+        _journal(interview_id).append(*records)
+    with metrics.span("disk", "index"):
+        interview_index.default_index().record(interview_id, _lookup(interview_id)[0], records)
+
+def end_journal(interview_id: str) -> None:
+    """Records the end of the interview, waits until everything is on disk and closes the journal."""
+    _submit_record(interview_id, {"ts": time.time(), "event": "end"})
+    close_journal(interview_id)  # flushes, syncs and releases the file handle
+
+def sync_journal(interview_id: str) -> None:
+    with _journals_lock:
+        j = _journals.get(interview_id)
+    if j is not None:
+        j.sync()
+
+def close_journal(interview_id: str) -> None:
+    _writer.flush(interview_id)
+    with _journals_lock:
+        j = _journals.pop(interview_id, None)
+    if j is not None:
+        j.close()
+
+def has_journal(interview_id: str) -> bool:
+    _writer.flush(interview_id)
+    path = os.path.join(_interview_dir_path(interview_id), JOURNAL_FILENAME)
+    return os.path.isfile(path) and os.path.getsize(path) > 0
+
+def is_resumable(interview_id: Optional[str]) -> bool:
+    """
+    Whether `interview_id` is an interview that started and never ended.
+    Callers hold the id themselves (the interview tab keeps it in the page
+    URL), so nobody can pick up someone else's interview by typing a name.
+    """
+    if not interview_id:
+        return False
+    row = interview_index.get_interview(interview_id)
+    return row is not None and row["ended_at"] is None
+
+def resume_interview(interview_id: str) -> Optional[Dict]:
+    """
+    Rebuilds an interview from its journal after a restart.
+    Returns {"id", "candidate", "role", "history", "ended", "started_at", "ended_at"}
+    or None if there is no journal. History entries match what the interview
+    tab keeps in st.session_state.interview_history.
+    """
+    if not has_journal(interview_id):  # flushes queued records first
+        return None
+    path = journal_path(interview_id)
+    with _journals_lock:
+        j = _journals.get(interview_id)
+        if j is not None:
+            j.sync()
+        else:
+            _recover(path)
+    user_dir = os.path.dirname(path)
+    state: Dict = {"id": interview_id, "candidate": _lookup(interview_id)[1], "role": None, "history": [], "ended": False,
+                   "started_at": None, "ended_at": None}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break  # torn record: everything before it is intact
+            event = rec.get("event")
+            if event == "start":
+                state["candidate"] = rec.get("candidate") or state["candidate"]
+                state["role"] = rec.get("role")
+                state["started_at"] = rec.get("ts")
+            elif event == "end":
+                state["ended"] = True
+                state["ended_at"] = rec.get("ts")
+            elif "role" in rec:
+                entry = {"role": rec["role"], "content": rec["content"]}
+                if rec.get("audio"):
+                    entry["audio_path"] = os.path.join(user_dir, rec["audio"])
+                state["history"].append(entry)
+    return state
+
+def render_transcript(interview_id: str, transcript_filename: str = "transcript.txt") -> Optional[str]:
+    """
+    Renders transcript.txt from the journal (the journal is the source of truth).
+    """
+    state = resume_interview(interview_id)
+    if state is None:
+        return None
+    return save_transcript(interview_id, state["history"], transcript_filename)
+
+def _shutdown() -> None:
+    try:
+        _writer.close(timeout=SHUTDOWN_FLUSH_TIMEOUT)
+    except Exception:
+        pass
+    with _journals_lock:
+        journals = list(_journals.values())
+        _journals.clear()
+    for j in journals:
+        try:
+            j.close()
+        except Exception:
+            pass
+
+atexit.register(_shutdown)